@@ -11,7 +11,7 @@ sklearn_env = Environment("sklearn-env")
 
 # Ensure the required packages are installed
 packages = CondaDependencies.create(conda_packages=['scikit-learn', 'pandas','pip'],
-                                    pip_packages=['azureml-defaults', 'azureml-core'])
+                                    pip_packages=['azureml-defaults', 'azureml-core', 'pyarrow'])
 sklearn_env.python.conda_dependencies = packages
 
 # Create a script config
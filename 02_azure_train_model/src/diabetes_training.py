@@ -5,6 +5,8 @@ import numpy as np
 import joblib
 import os
 import argparse
+import diabetes_store
+import incremental_training
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import roc_auc_score
@@ -23,36 +25,51 @@ run = Run.get_context()
 # Set regularization hyperparameter
 parser = argparse.ArgumentParser()
 parser.add_argument('--reg_rate', type=float, dest='reg', default=0.01)
+parser.add_argument('--streaming', action='store_true', help='train out of core on the dataset read in batches')
+parser.add_argument('--batch-size', type=int, dest='batch_size', default=65536, help='rows per batch when streaming')
+parser.add_argument('--epochs', type=int, dest='epochs', default=3, help='passes over the data when streaming')
 args = parser.parse_args()
 reg = args.reg
 
 # load the diabetes dataset
 diabetes = Dataset.get_by_name(workspace, name='diabetes-data')
-diabetes = diabetes.to_pandas_dataframe()
-
-# Separate features and labels
-X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
-
-# Split data into training set and test set
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
 
 # Set regularization hyperparameter
 reg = 0.01
+if args.streaming:
+    # (the streaming fit takes the --reg_rate argument)
+    reg = args.reg
 
-# Train a logistic regression model
 print('Training a logistic regression model with regularization rate of', reg)
 run.log('Regularization Rate',  np.float(reg))
-model = LogisticRegression(C=1/reg, solver="liblinear").fit(X_train, y_train)
+if args.streaming:
+    # Train out of core with SGD on the dataset's CSV files read in batches, holding out 30% of each batch
+    files = diabetes_store.source_files(diabetes)
+    model, metrics = incremental_training.fit_streaming(
+        lambda: diabetes_store.iter_xy(files, batch_size=args.batch_size, label_dtype=np.int8),
+        reg_rate=reg, epochs=args.epochs)
+    acc, auc = metrics['Accuracy'], metrics['AUC']
+else:
+    diabetes = diabetes.to_pandas_dataframe()
+
+    # Separate features and labels
+    X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
+
+    # Split data into training set and test set
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
 
-# calculate accuracy
-y_hat = model.predict(X_test)
-acc = np.average(y_hat == y_test)
+    # Train a logistic regression model
+    model = LogisticRegression(C=1/reg, solver="liblinear").fit(X_train, y_train)
+
+    # calculate accuracy
+    y_hat = model.predict(X_test)
+    acc = np.average(y_hat == y_test)
+
+    # calculate AUC
+    y_scores = model.predict_proba(X_test)
+    auc = roc_auc_score(y_test,y_scores[:,1])
 print('Accuracy:', acc)
 run.log('Accuracy', np.float(acc))
-
-# calculate AUC
-y_scores = model.predict_proba(X_test)
-auc = roc_auc_score(y_test,y_scores[:,1])
 print('AUC: ' + str(auc))
 run.log('AUC', np.float(auc))
 
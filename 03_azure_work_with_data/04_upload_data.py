@@ -8,7 +8,8 @@ ws = Workspace.get(name='aml-workspace',
 # Get the default datastore
 default_ds = ws.get_default_datastore()
 
-default_ds.upload_files(files=['./data/diabetes.csv'], # Upload the diabetes csv files in /data
-                       target_path='diabetes-data/', # Put it in a folder path in the datastore
-                       overwrite=True, # Replace existing files of the same name
-                       show_progress=True)
\ No newline at end of file
+# Upload the diabetes csv files in /data to a folder path in the datastore, skipping files already uploaded
+# unchanged (they are matched by content hash against the folder's upload manifest)
+from datastore_upload import BlobDatastore, upload
+report = upload(BlobDatastore(default_ds), files=['./data/diabetes.csv'], target_path='diabetes-data/')
+print(report.summary())
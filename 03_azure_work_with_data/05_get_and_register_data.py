@@ -21,6 +21,13 @@ file_data_set = Dataset.File.from_files(path=(default_ds, 'diabetes-data/*.csv')
 for file_path in file_data_set.to_path():
     print(file_path)
 
+# Stream the files in typed batches of the features and label, instead of loading them all into memory
+import sys
+sys.path.insert(0, './src')
+import diabetes_store
+for X, y in diabetes_store.iter_xy(file_data_set, batch_size=4096):
+    print('batch:', X.shape, X.dtype, 'diabetic:', int(y.sum()))
+
 # Register the tabular dataset
 try:
     tab_data_set = tab_data_set.register(workspace=ws, 
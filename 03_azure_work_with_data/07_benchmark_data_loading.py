@@ -0,0 +1,55 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+import pandas as pd
+
+# Use a fresh cache folder, so the first load includes the conversion
+os.environ['DIABETES_CACHE_DIR'] = tempfile.mkdtemp()
+# The diabetes data is read with diabetes_store, from the training scripts' folder
+sys.path.insert(0, './src')
+import diabetes_store
+
+csv_path = './data/diabetes.csv'
+repeats = 20
+
+
+# The original way every script loaded the data, kept here as the baseline
+def load_read_csv():
+    diabetes = pd.read_csv(csv_path)
+    return diabetes[diabetes_store.features].values, diabetes[diabetes_store.label].values
+
+
+def load_store():
+    return diabetes_store.load_xy(csv_path)
+
+
+# Get the peak memory allocated while loading, and the size of what is kept
+def memory_mb(load):
+    tracemalloc.start()
+    X, y = load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20, (X.nbytes + y.nbytes) / 2**20
+
+
+# Time the one-off conversion (hashing, parsing and writing the columns)
+start = time.perf_counter()
+diabetes_store.cached(csv_path)
+print('First load (conversion): {:.1f} ms'.format((time.perf_counter() - start) * 1000))
+
+# Compare repeated loads
+print('{:>10} {:>10} {:>14} {:>10}'.format('loader', 'load ms', 'peak alloc MB', 'X+y MB'))
+for name, load in [('read_csv', load_read_csv), ('store', load_store)]:
+    t = min(timeit.repeat(load, number=repeats, repeat=3)) / repeats
+    print('{:>10} {:>10.2f} {:>14.2f} {:>10.2f}'.format(name, t * 1000, *memory_mb(load)))
+
+# Both loaders give the same cases
+X_csv, y_csv = load_read_csv()
+X, y = load_store()
+assert (X == X_csv.astype('float32')).all() and (y == y_csv.astype(bool)).all()
+
+shutil.rmtree(os.environ['DIABETES_CACHE_DIR'])
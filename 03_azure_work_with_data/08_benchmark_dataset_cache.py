@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import numpy as np
+
+# Use a fresh cache folder, so the first load is a miss
+os.environ['DIABETES_CACHE_DIR'] = tempfile.mkdtemp()
+# The diabetes data is read with diabetes_store, from the training scripts' folder
+sys.path.insert(0, './src')
+import diabetes_store
+
+repeats = 20
+
+# An offline stand-in for run.input_datasets['training_data']
+dataset = diabetes_store.LocalDataset('./data/diabetes.csv', version=1)
+
+
+# The way the training scripts loaded their input dataset, kept here as the baseline
+def load_to_pandas():
+    diabetes = dataset.to_pandas_dataframe()
+    return diabetes[diabetes_store.features].values, diabetes[diabetes_store.label].values
+
+
+def load_cached():
+    return diabetes_store.load_dataset_xy(dataset, label_dtype=np.int8)
+
+
+# The first load materializes the dataset into the cache
+start = time.perf_counter()
+load_cached()
+print('Miss (materialize): {:.1f} ms, to_pandas_dataframe() calls: {}'.format(
+    (time.perf_counter() - start) * 1000, dataset.materialized))
+
+# Compare repeated loads, as every run or sweep trial on the node would do them
+print('{:>14} {:>10}'.format('loader', 'load ms'))
+for name, load in [('to_pandas', load_to_pandas), ('dataset cache', load_cached)]:
+    t = min(timeit.repeat(load, number=repeats, repeat=3)) / repeats
+    print('{:>14} {:>10.2f}'.format(name, t * 1000))
+dataset.materialized = 0
+load_cached()
+print('Hits: to_pandas_dataframe() calls:', dataset.materialized)
+
+# A new version of the dataset gets its own entry
+dataset.version = 2
+load_cached()
+print('New version: to_pandas_dataframe() calls:', dataset.materialized)
+
+# Both loaders give the same cases
+X_pandas, y_pandas = load_to_pandas()
+X, y = load_cached()
+assert (X == X_pandas.astype('float32')).all() and (y == y_pandas).all()
+
+shutil.rmtree(os.environ['DIABETES_CACHE_DIR'])
@@ -0,0 +1,57 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+import pyarrow as pa
+
+# The diabetes data is read with diabetes_store, from the training scripts' folder
+sys.path.insert(0, './src')
+import diabetes_store
+
+# A larger table, as several copies of the sample CSV (the production tables are far bigger than 10k rows)
+copies = 20
+batch_size = 65536
+folder = tempfile.mkdtemp()
+for i in range(copies):
+    shutil.copy('./data/diabetes.csv', os.path.join(folder, 'diabetes_{:02}.csv'.format(i)))
+
+
+# The way consumers read the data, kept here as the baseline
+def load_all():
+    diabetes = pd.concat([pd.read_csv(path) for path in diabetes_store.source_files(folder)])
+    X, y = diabetes[diabetes_store.features].values, diabetes[diabetes_store.label].values
+    return len(X), int(y.sum())
+
+
+def stream():
+    rows = diabetic = 0
+    for X, y in diabetes_store.iter_xy(folder, batch_size=batch_size):
+        rows += len(X)
+        diabetic += int(y.sum())
+    return rows, diabetic
+
+
+# Get the result, the time and the peak memory allocated by Python and by Arrow while reading
+def measure(read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = read()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+print('{:>10} {:>8} {:>10} {:>9} {:>16}'.format('reader', 'rows', 'diabetic', 'seconds', 'peak alloc MB'))
+results = []
+for name, read in [('load all', load_all), ('stream', stream)]:
+    (rows, diabetic), seconds, peak = measure(read)
+    results.append((rows, diabetic))
+    print('{:>10} {:>8} {:>10} {:>9.2f} {:>16.1f}'.format(name, rows, diabetic, seconds, peak))
+print('Arrow pool peak MB:', round(pa.default_memory_pool().max_memory() / 2**20, 1))
+assert results[0] == results[1]
+
+shutil.rmtree(folder)
@@ -0,0 +1,70 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+# The diabetes data is read with diabetes_store and incremental_training, from the training scripts' folder
+sys.path.insert(0, './src')
+import diabetes_store
+import incremental_training
+
+# Growing tables, as copies of the sample CSV with a little noise on the features (so the rows differ)
+row_counts = [10000, 100000, 400000]
+reg = 0.01
+batch_size = 65536
+folder = tempfile.mkdtemp()
+sample = pd.read_csv('./data/diabetes.csv')
+
+
+def write_table(rows):
+    rng = np.random.default_rng(0)
+    path = os.path.join(folder, 'diabetes_{}.csv'.format(rows))
+    for start in range(0, rows, len(sample)):
+        part = sample.iloc[:min(len(sample), rows - start)].copy()
+        part[diabetes_store.features] += rng.normal(0, 0.01, (len(part), len(diabetes_store.features)))
+        part.to_csv(path, index=False, header=start == 0, mode='w' if start == 0 else 'a')
+    return path
+
+
+# The current fit: read the whole table, split it and fit with liblinear
+def fit_in_memory(path):
+    diabetes = pd.read_csv(path)
+    X, y = diabetes[diabetes_store.features].values, diabetes[diabetes_store.label].values
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+    model = LogisticRegression(C=1/reg, solver="liblinear").fit(X_train, y_train)
+    y_scores = model.predict_proba(X_test)[:, 1]
+    return np.average((y_scores >= 0.5) == y_test), roc_auc_score(y_test, y_scores)
+
+
+def fit_streaming(path):
+    model, metrics = incremental_training.fit_streaming(
+        lambda: diabetes_store.iter_xy(path, batch_size=batch_size, label_dtype=np.int8), reg_rate=reg)
+    return metrics['Accuracy'], metrics['AUC']
+
+
+# Get the metrics, the wall time and the peak memory allocated while training
+def measure(fit, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    accuracy, auc = fit(path)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return accuracy, auc, seconds, peak / 2**20
+
+
+print('{:>8} {:>10} {:>9} {:>7} {:>9} {:>16}'.format('rows', 'fit', 'accuracy', 'AUC', 'seconds', 'peak alloc MB'))
+for rows in row_counts:
+    path = write_table(rows)
+    for name, fit in [('in memory', fit_in_memory), ('streaming', fit_streaming)]:
+        print('{:>8} {:>10} {:>9.4f} {:>7.4f} {:>9.2f} {:>16.1f}'.format(rows, name, *measure(fit, path)))
+    os.remove(path)
+
+shutil.rmtree(folder)
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from datastore_upload import LocalDatastore, upload
+
+# Batch files like 07_azure_batch_inferencing_service makes (one small CSV per patient), plus a few larger files
+small_files = 200
+large_files = 4
+large_size = 16 << 20
+# A datastore over a network: 20 ms per request and 40 MB/s per stream
+latency = 0.02
+bytes_per_second = 40 << 20
+
+src_dir = tempfile.mkdtemp()
+rng = np.random.default_rng(0)
+files = []
+for i in range(small_files):
+    files.append(os.path.join(src_dir, '{}.csv'.format(i + 1)))
+    rng.random(8).tofile(files[-1], sep=',')
+for i in range(large_files):
+    files.append(os.path.join(src_dir, 'part-{:05d}.npy'.format(i)))
+    np.save(files[-1], rng.random(large_size // 8))
+
+
+def run(name, datastore, max_workers):
+    summary = upload(datastore, files, 'batch-data', src_dir=src_dir, max_workers=max_workers).summary()
+    print('{:>24} {:>9} {:>8} {:>12.1f} {:>11.1f} {:>8.2f} {:>9}'.format(
+        name, summary['files_uploaded'], summary['files_skipped'], summary['bytes_uploaded'] / 2**20,
+        summary['bytes_skipped'] / 2**20, summary['seconds'],
+        '{:.1f}'.format(summary['upload_MB_per_s']) if summary['files_uploaded'] else '-'))
+
+
+print('{:>24} {:>9} {:>8} {:>12} {:>11} {:>8} {:>9}'.format(
+    'upload', 'uploaded', 'skipped', 'MB uploaded', 'MB skipped', 'seconds', 'MB/s'))
+# One file at a time, like datastore.upload(overwrite=True), to an empty datastore each time
+sequential = LocalDatastore(tempfile.mkdtemp(), latency, bytes_per_second)
+run('sequential', sequential, max_workers=1)
+datastore = LocalDatastore(tempfile.mkdtemp(), latency, bytes_per_second)
+run('parallel (8)', datastore, max_workers=8)
+run('parallel, unchanged', datastore, max_workers=8)
+
+# Change a tenth of the small files and one large file
+for path in files[:small_files // 10] + files[-1:]:
+    if path.endswith('.csv'):
+        rng.random(8).tofile(path, sep=',')
+    else:
+        np.save(path, rng.random(large_size // 8))
+run('parallel, 10% changed', datastore, max_workers=8)
+
+# The datastore holds the same bytes as the source folder
+for path in files:
+    with open(path, 'rb') as f, open(os.path.join(datastore.root, 'batch-data', os.path.basename(path)), 'rb') as g:
+        assert f.read() == g.read()
+
+for folder in (src_dir, sequential.root, datastore.root):
+    shutil.rmtree(folder)
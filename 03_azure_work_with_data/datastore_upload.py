@@ -0,0 +1,146 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Upload files to a datastore folder, skipping files that are already there. A manifest next to the folder (so
+# datasets over the folder don't include it) records the SHA-256 and size of every file uploaded through it,
+# so unchanged files are hashed locally and never re-sent.
+# The rest go through a bounded thread pool, each file in fixed-size chunks.
+# (A file changed or deleted in the datastore by other means is not noticed: delete the manifest to re-send all.)
+
+manifest_suffix = '.upload-manifest.json'
+
+
+# Get the SHA-256 of a file's content
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Read a file in chunks
+def read_chunks(path, chunk_size):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            yield block
+
+
+# An Azure blob datastore (such as ws.get_default_datastore()), written in blocks with azure-storage-blob
+class BlobDatastore:
+
+    def __init__(self, datastore):
+        from azure.storage.blob import ContainerClient
+        account_url = '{}://{}.blob.{}'.format(datastore.protocol or 'https', datastore.account_name, datastore.endpoint)
+        self.container = ContainerClient(account_url, datastore.container_name,
+                                         credential=datastore.account_key or datastore.sas_token)
+
+    def read(self, path):
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            return self.container.download_blob(path).readall()
+        except ResourceNotFoundError:
+            return None
+
+    # Stage every chunk as a block, and commit them together so the blob never appears half written
+    def write(self, path, chunks):
+        blob = self.container.get_blob_client(path)
+        block_ids = []
+        for i, chunk in enumerate(chunks):
+            block_ids.append('{:08d}'.format(i))
+            blob.stage_block(block_ids[-1], chunk)
+        blob.commit_block_list(block_ids)
+
+
+# Local stand-in for a datastore: a folder, with an optional per-request latency and per-stream bandwidth
+# so the upload can be tried and benchmarked offline
+class LocalDatastore:
+
+    def __init__(self, root, latency=0.0, bytes_per_second=None):
+        self.root = root
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def _request(self, size=0):
+        with self.lock:
+            self.requests += 1
+        time.sleep(self.latency + (size / self.bytes_per_second if self.bytes_per_second else 0))
+
+    def read(self, path):
+        self._request()
+        full_path = os.path.join(self.root, path)
+        if not os.path.exists(full_path):
+            return None
+        with open(full_path, 'rb') as f:
+            return f.read()
+
+    def write(self, path, chunks):
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        fd, staging = tempfile.mkstemp(dir=os.path.dirname(full_path))
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                self._request(len(chunk))
+                f.write(chunk)
+        self._request()
+        os.replace(staging, full_path)
+
+
+# Upload files (named by their path relative to src_dir, or by file name) into target_path,
+# with up to max_workers files hashed and uploaded at once
+def upload(datastore, files, target_path, src_dir=None, max_workers=8, chunk_size=4 << 20):
+    started = time.time()
+    target_path = target_path.strip('/')
+    names = [os.path.relpath(path, src_dir).replace(os.sep, '/') if src_dir else os.path.basename(path)
+             for path in files]
+    manifest_path = target_path + manifest_suffix
+    manifest = json.loads(datastore.read(manifest_path) or '{}')
+
+    def send(path, name):
+        datastore.write(target_path + '/' + name, read_chunks(path, chunk_size))
+
+    report = UploadReport()
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+        hashes = list(pool.map(file_hash, files))
+        uploads = []
+        for path, name, sha256 in zip(files, names, hashes):
+            size = os.path.getsize(path)
+            if manifest.get(name, {}).get('sha256') == sha256:
+                report.add('skipped', size)
+            else:
+                uploads.append(pool.submit(send, path, name))
+                report.add('uploaded', size)
+                manifest[name] = {'sha256': sha256, 'size': size}
+        for future in concurrent.futures.as_completed(uploads):
+            future.result()
+
+    # Record the uploads last, so files from an interrupted upload are sent again next time
+    if report.files['uploaded']:
+        datastore.write(manifest_path, [json.dumps(manifest, indent=1, sort_keys=True).encode()])
+    report.seconds = time.time() - started
+    return report
+
+
+class UploadReport:
+
+    def __init__(self):
+        self.files = {'uploaded': 0, 'skipped': 0}
+        self.bytes = {'uploaded': 0, 'skipped': 0}
+        self.seconds = 0.0
+
+    def add(self, status, size):
+        self.files[status] += 1
+        self.bytes[status] += size
+
+    def summary(self):
+        return {'files_uploaded': self.files['uploaded'], 'files_skipped': self.files['skipped'],
+                'bytes_uploaded': self.bytes['uploaded'], 'bytes_skipped': self.bytes['skipped'],
+                'seconds': self.seconds,
+                'upload_MB_per_s': self.bytes['uploaded'] / 2**20 / self.seconds if self.seconds else None}
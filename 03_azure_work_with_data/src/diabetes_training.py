@@ -5,6 +5,8 @@ from azureml.core import Run, Dataset
 import pandas as pd
 import numpy as np
 import joblib
+import diabetes_store
+import incremental_training
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import roc_auc_score
@@ -14,6 +16,9 @@ from sklearn.metrics import roc_curve
 parser = argparse.ArgumentParser()
 parser.add_argument('--regularization', type=float, dest='reg_rate', default=0.01, help='regularization rate')
 parser.add_argument("--input-data", type=str, dest='training_dataset_id', help='training dataset')
+parser.add_argument('--streaming', action='store_true', help='train out of core on the dataset read in batches')
+parser.add_argument('--batch-size', type=int, dest='batch_size', default=65536, help='rows per batch when streaming')
+parser.add_argument('--epochs', type=int, dest='epochs', default=3, help='passes over the data when streaming')
 args = parser.parse_args()
 
 # Set regularization hyperparameter (passed as an argument to the script)
@@ -24,28 +29,36 @@ run = Run.get_context()
 
 # Get the training dataset
 print("Loading Data...")
-diabetes = run.input_datasets['training_data'].to_pandas_dataframe()
+dataset = run.input_datasets['training_data']
+print('Training a logistic regression model with regularization rate of', reg)
+run.log('Regularization Rate',  np.float(reg))
 
-# Separate features and labels
-X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
+if args.streaming:
+    # Train out of core with SGD on the dataset's CSV files read in batches, holding out 30% of each batch
+    files = diabetes_store.source_files(dataset)
+    model, metrics = incremental_training.fit_streaming(
+        lambda: diabetes_store.iter_xy(files, batch_size=args.batch_size, label_dtype=np.int8),
+        reg_rate=reg, epochs=args.epochs)
+    acc, auc = metrics['Accuracy'], metrics['AUC']
+else:
+    # (the dataset is cached on the node by id and version, so later runs memory-map it instead of downloading it)
+    X, y = diabetes_store.load_dataset_xy(dataset, label_dtype=np.int8)
 
-# Split data into training set and test set
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+    # Split data into training set and test set
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
 
-# Train a logistic regression model
-print('Training a logistic regression model with regularization rate of', reg)
-run.log('Regularization Rate',  np.float(reg))
-model = LogisticRegression(C=1/reg, solver="liblinear").fit(X_train, y_train)
+    # Train a logistic regression model
+    model = LogisticRegression(C=1/reg, solver="liblinear").fit(X_train, y_train)
+
+    # calculate accuracy
+    y_hat = model.predict(X_test)
+    acc = np.average(y_hat == y_test)
 
-# calculate accuracy
-y_hat = model.predict(X_test)
-acc = np.average(y_hat == y_test)
+    # calculate AUC
+    y_scores = model.predict_proba(X_test)
+    auc = roc_auc_score(y_test,y_scores[:,1])
 print('Accuracy:', acc)
 run.log('Accuracy', np.float(acc))
-
-# calculate AUC
-y_scores = model.predict_proba(X_test)
-auc = roc_auc_score(y_test,y_scores[:,1])
 print('AUC: ' + str(auc))
 run.log('AUC', np.float(auc))
 
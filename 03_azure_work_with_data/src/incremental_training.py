@@ -0,0 +1,63 @@
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+# Out-of-core training of the diabetes logistic regression: the data is read as a stream of (X, y) batches,
+# several times over, and never held in memory at once. Each batch's rows are split into training and held-out
+# rows the same way on every pass, so the held-out stream plays the part of train_test_split's test set.
+
+
+# Get which rows of a batch are held out (the same rows on every pass)
+def held_out(batch_index, rows, test_size=0.30, seed=0):
+    return np.random.default_rng([seed, batch_index]).random(rows) < test_size
+
+
+# AUC from histograms of the positive and negative scores, so the held-out scores are never all kept
+# (scores in the same bin count as ties, which with 10000 bins moves the AUC by well under 0.001)
+class StreamingAUC:
+
+    def __init__(self, bins=10000):
+        self.edges = np.linspace(0, 1, bins + 1)
+        self.positive = np.zeros(bins)
+        self.negative = np.zeros(bins)
+
+    def update(self, y, scores):
+        self.positive += np.histogram(scores[y == 1], self.edges)[0]
+        self.negative += np.histogram(scores[y == 0], self.edges)[0]
+
+    def score(self):
+        # Each positive beats the negatives in lower bins, and ties half of those in its own bin
+        below = np.cumsum(self.negative) - self.negative
+        wins = (self.positive * (below + self.negative / 2)).sum()
+        return wins / (self.positive.sum() * self.negative.sum())
+
+
+# Fit a logistic regression on the stream that batches() returns (called once per pass), and get its held-out
+# Accuracy and AUC. The features are standardized with statistics from a first pass, and the L2 penalty
+# matches LogisticRegression(C=1/reg_rate): alpha is reg_rate per training row.
+def fit_streaming(batches, reg_rate=0.01, epochs=3, test_size=0.30, seed=0):
+    scaler = StandardScaler()
+    n_train = 0
+    for i, (X, y) in enumerate(batches()):
+        train = ~held_out(i, len(y), test_size, seed)
+        scaler.partial_fit(X[train])
+        n_train += int(train.sum())
+
+    # (averaged SGD with a small constant step: the default schedule takes huge steps when alpha is this small)
+    model = SGDClassifier(loss='log_loss', alpha=reg_rate / n_train, learning_rate='constant', eta0=0.01,
+                          average=True, random_state=seed)
+    for epoch in range(epochs):
+        for i, (X, y) in enumerate(batches()):
+            train = ~held_out(i, len(y), test_size, seed)
+            model.partial_fit(scaler.transform(X[train]), y[train], classes=[0, 1])
+
+    correct = tested = 0
+    auc = StreamingAUC()
+    for i, (X, y) in enumerate(batches()):
+        test = held_out(i, len(y), test_size, seed)
+        scores = model.predict_proba(scaler.transform(X[test]))[:, 1]
+        correct += int(((scores >= 0.5) == y[test]).sum())
+        tested += int(test.sum())
+        auc.update(y[test], scores)
+    return make_pipeline(scaler, model), {'Accuracy': correct / tested, 'AUC': float(auc.score())}
@@ -4,6 +4,7 @@ from azureml.core import Run
 import pandas as pd
 import numpy as np
 import joblib
+import diabetes_store
 import os
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
@@ -25,10 +26,8 @@ run = Run.get_context()
 
 # load the diabetes data (passed as an input dataset)
 print("Loading Data...")
-diabetes = run.input_datasets['training_data'].to_pandas_dataframe()
-
-# Separate features and labels
-X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
+# (the dataset is cached on the node by id and version, so later runs memory-map it instead of downloading it)
+X, y = diabetes_store.load_dataset_xy(run.input_datasets['training_data'], label_dtype=np.int8)
 
 # Split data into training set and test set
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
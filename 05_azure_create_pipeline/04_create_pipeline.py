@@ -2,10 +2,10 @@ from azureml.core import Workspace
 from azureml.core import Environment
 from azureml.core.compute import ComputeTarget
 from azureml.core.runconfig import RunConfiguration
-from azureml.data import OutputFileDatasetConfig
-from azureml.pipeline.steps import PythonScriptStep
 from azureml.core import Experiment
 from azureml.pipeline.core import Pipeline
+from local_pipeline import azure_steps
+from diabetes_dag import diabetes_steps
 # from azureml.widgets import RunDetails
 
 # Get workspace
@@ -35,32 +35,15 @@ print ("Run configuration created.")
 # Get the training dataset
 diabetes_ds = ws.datasets.get("diabetes dataset")
 
-# Create an OutputFileDatasetConfig (temporary Data Reference) for data passed from step 1 to step 2
-prepped_data = OutputFileDatasetConfig("prepped_data")
-
-# Step 1, Run the data prep script
-prep_step = PythonScriptStep(name = "Prepare Data",
-                                source_directory = './src',
-                                script_name = "prep_diabetes.py",
-                                arguments = ['--input-data', diabetes_ds.as_named_input('raw_data'),
-                                             '--prepped-data', prepped_data],
-                                compute_target = pipeline_cluster,
-                                runconfig = pipeline_run_config,
-                                allow_reuse = True)
-
-# Step 2, run the training script
-train_step = PythonScriptStep(name = "Train and Register Model",
-                                source_directory = './src',
-                                script_name = "train_diabetes.py",
-                                arguments = ['--training-data', prepped_data.as_input()],
-                                compute_target = pipeline_cluster,
-                                runconfig = pipeline_run_config,
-                                allow_reuse = True)
+# Prep once, train the candidate models in parallel from the prepped data, then register the best one
+# (the same steps 06_run_pipeline_locally.py runs on this machine; data passed between steps goes through OutputFileDatasetConfigs)
+pipeline_steps = azure_steps(diabetes_steps(diabetes_ds.as_named_input('raw_data')),
+                             compute_target = pipeline_cluster,
+                             runconfig = pipeline_run_config)
 
 print("Pipeline steps defined")
 
 # Construct the pipeline
-pipeline_steps = [prep_step, train_step]
 pipeline = Pipeline(workspace=ws, steps=pipeline_steps)
 print("Pipeline is built.")
 
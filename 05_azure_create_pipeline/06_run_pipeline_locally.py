@@ -0,0 +1,24 @@
+import os
+from local_pipeline import LocalInput, LocalPipeline
+from diabetes_dag import diabetes_steps
+
+# Run the same steps as 04_create_pipeline.py on this machine (no workspace needed).
+# The candidate models train at the same time once the prepped data is ready, and steps whose scripts,
+# arguments and inputs are unchanged are reused from the cache, so after an edit only the edited step
+# and the steps after it run again.
+
+# Keep the ROC plot window from blocking the training steps
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+steps = diabetes_steps(LocalInput('../03_azure_work_with_data/data/diabetes.csv'))
+pipeline = LocalPipeline(steps=steps, cache_dir='.pipeline-cache', max_workers=4)
+
+# Run it twice: the second run should reuse every step
+for attempt in range(2):
+    print('Run', attempt + 1)
+    report = pipeline.run()
+    report.print()
+    print(report.summary())
+
+with open(os.path.join(steps[-1].outputs_folder, 'metrics.json')) as f:
+    print('Best model:', f.read())
@@ -0,0 +1,33 @@
+from local_pipeline import LocalOutput, LocalStep
+
+# Candidate models trained side by side from the same prepped data, with their script arguments
+candidate_models = {
+    'decision_tree': [],
+    'logistic_regression': ['--reg_rate', '0.01'],
+    'gradient_boosting': ['--learning_rate', '0.1', '--n_estimators', '100'],
+}
+
+
+# Get the pipeline steps: prep, one training step per candidate (fan-out), then compare and register (fan-in).
+# raw_data is a LocalInput for local runs, or a dataset's as_named_input('raw_data') for Azure ML.
+def diabetes_steps(raw_data):
+    prepped_data = LocalOutput('prepped_data')
+    steps = [LocalStep(name = "Prepare Data",
+                       source_directory = './src',
+                       script_name = "prep_diabetes.py",
+                       arguments = ['--input-data', raw_data,
+                                    '--prepped-data', prepped_data])]
+    candidates = []
+    for model, arguments in candidate_models.items():
+        candidate = LocalOutput(model)
+        steps.append(LocalStep(name = "Train " + model.replace('_', ' '),
+                               source_directory = './src',
+                               script_name = "train_diabetes.py",
+                               arguments = ['--training-data', prepped_data.as_input(),
+                                            '--model', model] + arguments + ['--model-output', candidate]))
+        candidates.append(candidate.as_input())
+    steps.append(LocalStep(name = "Compare and Register Model",
+                           source_directory = './src',
+                           script_name = "register_best.py",
+                           arguments = ['--candidates'] + candidates))
+    return steps
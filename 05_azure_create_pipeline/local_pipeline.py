@@ -0,0 +1,245 @@
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Local stand-in for Pipeline/PythonScriptStep with allow_reuse: each step runs in a snapshot of its source folder,
+# and is skipped when the hash of its script (with the local modules it imports), arguments and inputs already has
+# cached outputs. Steps sharing a source folder are keyed separately, so an edit only re-runs the steps it touches.
+# Steps form a DAG through the LocalOutputs they share, and every step whose inputs are ready runs at once.
+
+
+# A data file or folder passed to a step, like a dataset's as_named_input()
+class LocalInput:
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+
+# A folder written by one step and read by the next, like OutputFileDatasetConfig
+class LocalOutput:
+
+    def __init__(self, name):
+        self.name = name
+        self.producer = None
+        self.path = None
+
+    def as_input(self):
+        return self
+
+
+class LocalStep:
+
+    def __init__(self, name, source_directory, script_name, arguments=None, allow_reuse=True):
+        self.name = name
+        self.source_directory = source_directory
+        self.script_name = script_name
+        self.arguments = arguments or []
+        self.allow_reuse = allow_reuse
+
+    # Outputs this step writes (every LocalOutput that no earlier step has claimed)
+    def outputs(self):
+        return [a for a in self.arguments if isinstance(a, LocalOutput) and a.producer in (None, self)]
+
+
+# Get the SHA-256 of a file, or of every file in a folder with its relative path
+def content_hash(path):
+    digest = hashlib.sha256()
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, f) for root, dirs, files in os.walk(path) for f in files if '__pycache__' not in root)
+    for p in paths:
+        digest.update(os.path.relpath(p, path).encode())
+        with open(p, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# Get a script and the modules of the source folder it imports, directly or through other such modules
+def script_files(source_directory, script_name):
+    files = []
+    pending = [script_name]
+    while pending:
+        name = pending.pop()
+        if name in files:
+            continue
+        files.append(name)
+        with open(os.path.join(source_directory, name), 'rb') as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                module_file = module.split('.')[0] + '.py'
+                if os.path.isfile(os.path.join(source_directory, module_file)):
+                    pending.append(module_file)
+    return sorted(files)
+
+
+# Mark the step that writes each LocalOutput (steps are listed with every producer before its consumers)
+def assign_producers(steps):
+    for step in steps:
+        for output in step.outputs():
+            output.producer = step
+
+
+# Get the steps that write the LocalOutputs a step reads
+def dependencies(step):
+    return [a.producer for a in step.arguments if isinstance(a, LocalOutput) and a.producer is not step]
+
+
+# Turn the steps into PythonScriptSteps for an Azure ML Pipeline (LocalOutputs become OutputFileDatasetConfigs,
+# and the pipeline runs independent steps in parallel from those data dependencies)
+def azure_steps(steps, compute_target, runconfig):
+    from azureml.data import OutputFileDatasetConfig
+    from azureml.pipeline.steps import PythonScriptStep
+    assign_producers(steps)
+    configs = {}
+    pipeline_steps = []
+    for step in steps:
+        arguments = []
+        for argument in step.arguments:
+            if isinstance(argument, LocalInput):
+                raise ValueError('Step "{}" needs a dataset input instead of the local path {}'.format(step.name, argument.path))
+            if isinstance(argument, LocalOutput):
+                config = configs.setdefault(argument.name, OutputFileDatasetConfig(argument.name))
+                argument = config if argument.producer is step else config.as_input()
+            arguments.append(argument)
+        pipeline_steps.append(PythonScriptStep(name=step.name,
+                                               source_directory=step.source_directory,
+                                               script_name=step.script_name,
+                                               arguments=arguments,
+                                               compute_target=compute_target,
+                                               runconfig=runconfig,
+                                               allow_reuse=step.allow_reuse))
+    return pipeline_steps
+
+
+class LocalPipeline:
+
+    def __init__(self, steps, cache_dir='.pipeline-cache', max_workers=None):
+        self.steps = steps
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_workers = max_workers or os.cpu_count()
+        assign_producers(steps)
+
+    # Hash everything that can change a step's outputs (inputs from earlier steps are named by their own key)
+    def step_key(self, step):
+        digest = hashlib.sha256()
+        for name in script_files(step.source_directory, step.script_name):
+            digest.update(name.encode() + b'\0' + content_hash(os.path.join(step.source_directory, name)).encode())
+        for argument in step.arguments:
+            if isinstance(argument, LocalInput):
+                token = 'input:' + content_hash(argument.path)
+            elif isinstance(argument, LocalOutput) and argument.producer is step:
+                token = 'output:' + argument.name
+            elif isinstance(argument, LocalOutput):
+                token = 'from:{}/{}'.format(argument.producer.key, argument.name)
+            else:
+                token = 'arg:' + str(argument)
+            digest.update(token.encode() + b'\0')
+        return digest.hexdigest()
+
+    # Run every step once all the steps it depends on have finished, up to max_workers at a time
+    def run(self):
+        started = time.time()
+        results = {}
+        remaining = list(self.steps)
+        running = {}
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            while remaining or running:
+                for step in [s for s in remaining if all(d in results for d in dependencies(s))]:
+                    remaining.remove(step)
+                    running[pool.submit(self.run_step, step, started)] = step
+                if not running:
+                    raise ValueError('Steps {} read outputs no step writes'.format([s.name for s in remaining]))
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future)] = future.result()
+        return Report([results[step] for step in self.steps], time.time() - started)
+
+    def run_step(self, step, pipeline_started=None):
+        started = time.time()
+        offset = started - (pipeline_started or started)
+        step.key = self.step_key(step)
+        folder = os.path.join(self.cache_dir, step.key)
+        manifest = os.path.join(folder, 'step.json')
+        if step.allow_reuse and os.path.exists(manifest):
+            with open(manifest) as f:
+                previous = json.load(f)
+            self._bind_outputs(step, folder)
+            return {'step': step.name, 'key': step.key[:12], 'reused': True,
+                    'started_s': offset, 'seconds': 0.0, 'saved_s': previous['seconds']}
+
+        # Run in a snapshot of the source folder, writing outputs to a staging folder first
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.cache_dir)
+        snapshot = os.path.join(staging, 'snapshot')
+        shutil.copytree(step.source_directory, snapshot, ignore=shutil.ignore_patterns('__pycache__'))
+        arguments = []
+        for argument in step.arguments:
+            if isinstance(argument, LocalInput):
+                argument = argument.path
+            elif isinstance(argument, LocalOutput) and argument.producer is step:
+                argument = os.path.join(staging, argument.name)
+            elif isinstance(argument, LocalOutput):
+                argument = argument.path
+            arguments.append(str(argument))
+        # Steps run side by side, so each one writes its console output to its own log
+        log_path = os.path.join(staging, 'step.log')
+        with open(log_path, 'w') as log:
+            completed = subprocess.run([sys.executable, step.script_name] + arguments, cwd=snapshot,
+                                       stdout=log, stderr=subprocess.STDOUT)
+        seconds = time.time() - started
+        if completed.returncode != 0:
+            with open(log_path) as log:
+                output = log.read()
+            shutil.rmtree(staging, ignore_errors=True)
+            raise RuntimeError('Step "{}" failed with exit code {}:\n{}'.format(step.name, completed.returncode, output[-2000:]))
+
+        # Keep the run's outputs folder too, like the files an Azure ML run uploads
+        if os.path.isdir(os.path.join(snapshot, 'outputs')):
+            shutil.move(os.path.join(snapshot, 'outputs'), os.path.join(staging, 'outputs'))
+        shutil.rmtree(snapshot)
+        with open(os.path.join(staging, 'step.json'), 'w') as f:
+            json.dump({'step': step.name, 'script': step.script_name, 'key': step.key, 'seconds': seconds}, f)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.rename(staging, folder)
+        self._bind_outputs(step, folder)
+        return {'step': step.name, 'key': step.key[:12], 'reused': False,
+                'started_s': offset, 'seconds': seconds, 'saved_s': 0.0}
+
+    def _bind_outputs(self, step, folder):
+        for output in step.outputs():
+            output.path = os.path.abspath(os.path.join(folder, output.name))
+        step.outputs_folder = os.path.abspath(os.path.join(folder, 'outputs'))
+
+
+class Report:
+
+    def __init__(self, steps, wall_clock):
+        self.steps = steps
+        self.wall_clock = wall_clock
+
+    def summary(self):
+        return {'steps': len(self.steps),
+                'reused': sum(s['reused'] for s in self.steps),
+                'run_s': sum(s['seconds'] for s in self.steps),
+                'saved_s': sum(s['saved_s'] for s in self.steps),
+                'wall_clock_s': self.wall_clock}
+
+    def print(self):
+        print('{:<34} {:<14} {:>7} {:>10} {:>10} {:>10}'.format('step', 'key', 'reused', 'start s', 'run s', 'saved s'))
+        for s in self.steps:
+            print('{:<34} {:<14} {:>7} {:>10.2f} {:>10.2f} {:>10.2f}'.format(s['step'], s['key'], 'yes' if s['reused'] else 'no',
+                                                                          s['started_s'], s['seconds'], s['saved_s']))
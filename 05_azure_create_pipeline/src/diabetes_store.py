@@ -0,0 +1,238 @@
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Columns the diabetes models are trained on, and the label column
+features = ['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']
+label = 'Diabetic'
+
+# Converted files are kept here (set DIABETES_CACHE_DIR to use another folder)
+cache_dir = os.getenv('DIABETES_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'diabetes-cache')
+
+
+# Get the SHA-256 of a file's content, so an edited CSV gets a new cache entry
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Parse a CSV once and save every column as its own .npy file (features as float32, the label as bool)
+def convert(csv_path, folder):
+    import pandas as pd
+    return save_columns(pd.read_csv(csv_path), folder)
+
+
+# Save every column of a DataFrame as its own .npy file in a new cache folder, and the features together as one
+# C-contiguous float32 matrix (features.npy), which load_xy memory-maps as it is
+def save_columns(data, folder):
+    # Write to a temporary folder first, so other processes never see a half-written entry
+    os.makedirs(os.path.dirname(folder), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(folder))
+    for column in data.columns:
+        values = data[column].to_numpy()
+        if column in features:
+            values = values.astype(np.float32)
+        elif column == label:
+            values = values.astype(bool)
+        np.save(os.path.join(staging, column + '.npy'), values)
+    if all(column in data.columns for column in features):
+        np.save(os.path.join(staging, 'features.npy'), np.ascontiguousarray(data[features].to_numpy(dtype=np.float32)))
+    try:
+        os.rename(staging, folder)
+    except OSError:
+        # Another process converted the same data first
+        shutil.rmtree(staging, ignore_errors=True)
+    return folder
+
+
+# Content hashes already known in this process, by (path, size, mtime)
+known_hashes = {}
+
+
+# Get a file's content hash, only reading the file when its path, size or modification time is new: the hash is
+# remembered in this process and in a small index file in the cache folder, for the next processes
+def content_hash(path):
+    stat = os.stat(path)
+    key = '{}\0{}\0{}'.format(os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in known_hashes:
+        index = os.path.join(cache_dir, 'stat-' + hashlib.sha256(key.encode()).hexdigest())
+        try:
+            with open(index) as f:
+                known_hashes[key] = f.read()
+        except FileNotFoundError:
+            known_hashes[key] = file_hash(path)
+            # (written under a temporary name first, so other processes never read a partial hash)
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, staging = tempfile.mkstemp(dir=cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                f.write(known_hashes[key])
+            os.replace(staging, index)
+    return known_hashes[key]
+
+
+# Get the cache folder for a CSV, converting it on first use
+def cached(csv_path):
+    folder = os.path.join(cache_dir, content_hash(csv_path))
+    if not os.path.isdir(folder):
+        convert(csv_path, folder)
+    return folder
+
+
+# Get columns of a CSV as memory-mapped arrays, by name
+def load_columns(csv_path, columns, mmap_mode='r'):
+    folder = cached(csv_path)
+    return {column: np.load(os.path.join(folder, column + '.npy'), mmap_mode=mmap_mode) for column in columns}
+
+
+# Get the cache folder for a tabular dataset (such as run.input_datasets['training_data']), keyed by its id and
+# version, materializing it with to_pandas_dataframe() only on a miss. Runs and sweep trials on the same node
+# then skip the download and parse. A dataset's id changes when its definition does.
+def cached_dataset(dataset):
+    key = '{}-{}'.format(dataset.id, dataset.version)
+    folder = os.path.join(cache_dir, 'dataset-' + ''.join(c if c.isalnum() or c in '-_.' else '_' for c in key))
+    if not os.path.isdir(folder):
+        save_columns(dataset.to_pandas_dataframe(), folder)
+    return folder
+
+
+# Get columns of a tabular dataset as memory-mapped arrays, by name
+def load_dataset_columns(dataset, columns, mmap_mode='r'):
+    folder = cached_dataset(dataset)
+    return {column: np.load(os.path.join(folder, column + '.npy'), mmap_mode=mmap_mode) for column in columns}
+
+
+# Get the float32 feature matrix and the label of a tabular dataset, like load_xy
+def load_dataset_xy(dataset, columns=features, label_dtype=bool):
+    return cached_xy(cached_dataset(dataset), columns, label_dtype)
+
+
+# Get the feature matrix and the label from a cache folder: the standard features come memory-mapped (read-only)
+# from features.npy, so processes and sweep trials on the same node share its pages; other columns are stacked
+# into a new matrix
+def cached_xy(folder, columns=features, label_dtype=bool, mmap_mode='r'):
+    matrix = os.path.join(folder, 'features.npy')
+    if list(columns) == features and os.path.exists(matrix):
+        y = np.load(os.path.join(folder, label + '.npy'), mmap_mode=mmap_mode)
+        return np.load(matrix, mmap_mode=mmap_mode), np.asarray(y, dtype=label_dtype)
+    data = {column: np.load(os.path.join(folder, column + '.npy'), mmap_mode=mmap_mode)
+            for column in list(columns) + [label]}
+    return stack_xy(data, columns, label_dtype)
+
+
+# Get local CSV paths for a source: a path, folder or glob pattern, a list of paths, a FileDataset (downloaded),
+# or a TabularDataset (written out as CSV files first)
+def source_files(source):
+    if isinstance(source, (list, tuple)):
+        return [path for item in source for path in source_files(item)]
+    if isinstance(source, str):
+        pattern = os.path.join(source, '*.csv') if os.path.isdir(source) else source
+        return sorted(glob.glob(pattern))
+    if hasattr(source, 'to_csv_files'):
+        source = source.to_csv_files()
+    return sorted(path for path in source.download(target_path=tempfile.mkdtemp(), overwrite=True)
+                  if path.endswith('.csv'))
+
+
+# Read the CSV files of a source as a stream of typed Arrow record batches of batch_size rows (the last may be
+# shorter), reading only the given columns (the features and the label by default). Files are parsed a block at a
+# time, so memory use depends on batch_size and not on the size of the data.
+def iter_batches(source, columns=None, batch_size=65536, feature_dtype='float32'):
+    import pyarrow as pa
+    import pyarrow.csv as csv
+    columns = list(columns or features + [label])
+    types = dict(PatientID=pa.int64(), **{column: pa.from_numpy_dtype(np.dtype(feature_dtype)) for column in features},
+                 **{label: pa.bool_()})
+    convert_options = csv.ConvertOptions(include_columns=columns,
+                                         column_types={column: types[column] for column in columns if column in types})
+    pending, rows = [], 0
+    for path in source_files(source):
+        for batch in csv.open_csv(path, read_options=csv.ReadOptions(block_size=1 << 20),
+                                  convert_options=convert_options):
+            pending.append(batch)
+            rows += batch.num_rows
+            while rows >= batch_size:
+                table = pa.Table.from_batches(pending)
+                yield table.slice(0, batch_size).combine_chunks().to_batches()[0]
+                pending, rows = table.slice(batch_size).to_batches(), rows - batch_size
+    if rows:
+        yield pa.Table.from_batches(pending).combine_chunks().to_batches()[0]
+
+
+# Get the float32 feature matrix and the label of each batch, like load_xy
+def iter_xy(source, batch_size=65536, columns=features, label_dtype=bool):
+    for batch in iter_batches(source, list(columns) + [label], batch_size):
+        data = {column: batch.column(column).to_numpy(zero_copy_only=False) for column in batch.schema.names}
+        yield stack_xy(data, columns, label_dtype)
+
+
+# Offline stand-in for a registered TabularDataset made from a CSV, for trying and benchmarking the cache.
+# Its id is the CSV's hash, and materialized counts to_pandas_dataframe() calls (cache misses).
+class LocalDataset:
+
+    def __init__(self, csv_path, name='diabetes dataset', version=1):
+        self.csv_path = csv_path
+        self.name = name
+        self.version = version
+        self.id = content_hash(csv_path)
+        self.materialized = 0
+
+    def to_pandas_dataframe(self):
+        import pandas as pd
+        self.materialized += 1
+        return pd.read_csv(self.csv_path)
+
+    # Like FileDataset.download(), for iter_batches()
+    def download(self, target_path=None, overwrite=False):
+        return [self.csv_path]
+
+
+# Write a DataFrame as an uncompressed Arrow (Feather) file with fixed column types (float64 features keep every digit)
+def save_arrow(data, path):
+    return save_arrow_batches([data], path)
+
+
+# Write DataFrames one after another into the same Arrow file, so a large table never has to be in memory at once
+def save_arrow_batches(frames, path):
+    import pyarrow as pa
+    types = dict(PatientID=pa.int64(), **{column: pa.float64() for column in features}, **{label: pa.bool_()})
+    writer = None
+    try:
+        for data in frames:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            if writer is None:
+                schema = pa.schema([pa.field(field.name, types.get(field.name, field.type)) for field in table.schema])
+                writer = pa.ipc.new_file(path, schema)
+            writer.write_table(table.cast(schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+# Get columns of an Arrow file as NumPy arrays backed by the memory-mapped file
+def load_arrow_columns(path, columns):
+    import pyarrow as pa
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return {column: table.column(column).to_numpy() for column in columns}
+
+
+# Get the float32 feature matrix and the label (bool, or label_dtype such as np.int8 for 0/1 classes)
+# from a CSV (through the cache, memory-mapped like cached_xy) or an Arrow file written by save_arrow (copied)
+def load_xy(path, columns=features, label_dtype=bool):
+    if path.endswith('.arrow'):
+        return stack_xy(load_arrow_columns(path, list(columns) + [label]), columns, label_dtype)
+    return cached_xy(cached(path), columns, label_dtype)
+
+
+# Copy separate columns into a new float32 feature matrix
+def stack_xy(data, columns, label_dtype):
+    X = np.empty((len(data[label]), len(columns)), dtype=np.float32)
+    for j, column in enumerate(columns):
+        X[:, j] = data[column]
+    return X, np.asarray(data[label], dtype=label_dtype)
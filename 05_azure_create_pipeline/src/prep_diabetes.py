@@ -1,46 +1,100 @@
 # Import libraries
+import collections
 import os
+import shutil
 import argparse
-import pandas as pd
-from azureml.core import Run
+from azureml.core import Run, Model
 from sklearn.preprocessing import MinMaxScaler
+import diabetes_store
+from feature_scaler import export_scaler, AffineScaler
 
 
 # Get parameters
 parser = argparse.ArgumentParser()
 parser.add_argument("--input-data", type=str, dest='raw_dataset_id', help='raw dataset')
 parser.add_argument('--prepped-data', type=str, dest='prepped_data', default='prepped_data', help='Folder for results')
+parser.add_argument('--prepped-format', type=str, dest='prepped_format', default='arrow', choices=['arrow', 'csv'], help='File format for results')
 args = parser.parse_args()
 save_folder = args.prepped_data
 
 # Get the experiment run context
 run = Run.get_context()
 
-# load the data (passed as an input dataset)
+# Get the data (passed as an input dataset, or as a CSV file path when the script runs outside Azure ML).
+# It is streamed in batches twice, to fit the scaler and then to scale and save it, so memory use stays constant.
 print("Loading Data...")
-diabetes = run.input_datasets['raw_data'].to_pandas_dataframe()
+offline = run.id.startswith('OfflineRun')
+if offline:
+    raw_dataset = None
+    raw_files = diabetes_store.source_files(args.raw_dataset_id)
+else:
+    raw_dataset = run.input_datasets['raw_data']
+    raw_files = diabetes_store.source_files(raw_dataset)
+columns = ['PatientID'] + diabetes_store.features + [diabetes_store.label]
+batch_size = 65536
 
-# Log raw row count
-row_count = (len(diabetes))
-run.log('raw_rows', row_count)
 
-# remove nulls
-diabetes = diabetes.dropna()
+# Get the batches as DataFrames with the nulls removed
+def batches(counts):
+    for batch in diabetes_store.iter_batches(raw_files, columns, batch_size, feature_dtype='float64'):
+        counts['raw_rows'] += batch.num_rows
+        diabetes = batch.to_pandas().dropna()
+        counts['processed_rows'] += len(diabetes)
+        yield diabetes
 
-# Normalize the numeric columns
-scaler = MinMaxScaler()
+
+# Normalize the numeric columns, reusing the scaler fitted on the same dataset version when there is one
 num_cols = ['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree']
-diabetes[num_cols] = scaler.fit_transform(diabetes[num_cols])
+scaler_file = 'diabetes_scaler.npy'
+os.makedirs(save_folder, exist_ok=True)
+scaler_path = os.path.join(save_folder, scaler_file)
+if offline:
+    # There is no workspace to keep the scaler in (a local step cache reuses the whole step instead)
+    dataset_key, fitted = args.raw_dataset_id, []
+else:
+    ws = run.experiment.workspace
+    dataset_key = '{}:{}'.format(raw_dataset.name, raw_dataset.version) if raw_dataset.name else raw_dataset.id
+    fitted = Model.list(ws, name='diabetes_scaler', tags=[['dataset', dataset_key]], latest=True)
+if fitted:
+    print('Reusing scaler fitted on', dataset_key)
+    fitted[0].download(target_dir='scaler', exist_ok=True)
+    shutil.copy(os.path.join('scaler', scaler_file), scaler_path)
+else:
+    print('Fitting scaler on', dataset_key)
+    min_max = MinMaxScaler()
+    for diabetes in batches(collections.Counter()):
+        min_max.partial_fit(diabetes[num_cols])
+    export_scaler(min_max, num_cols, diabetes_store.features, scaler_path)
+    if not offline:
+        Model.register(workspace=ws, model_path=scaler_path, model_name='diabetes_scaler',
+                       tags={'dataset': dataset_key}, description='MinMaxScaler parameters for the diabetes features')
+run.log('scaler_reused', bool(fitted))
+
+# Apply the saved scale and offset to all the features at once (Age keeps a scale of 1 and an offset of 0)
+scaler = AffineScaler.load(scaler_path)
+counts = collections.Counter()
+
 
-# Log processed rows
-row_count = (len(diabetes))
-run.log('processed_rows', row_count)
+def scaled(counts):
+    for diabetes in batches(counts):
+        diabetes[diabetes_store.features] = scaler.transform(diabetes[diabetes_store.features].values, dtype='float64')
+        yield diabetes
 
-# Save the prepped data
+
+# Save the prepped data (the scaler parameters are already in the same folder)
 print("Saving Data...")
-os.makedirs(save_folder, exist_ok=True)
-save_path = os.path.join(save_folder,'data.csv')
-diabetes.to_csv(save_path, index=False, header=True)
+if args.prepped_format == 'arrow':
+    # Typed binary columns, so the training step can memory-map them instead of parsing text
+    save_path = diabetes_store.save_arrow_batches(scaled(counts), os.path.join(save_folder,'data.arrow'))
+else:
+    save_path = os.path.join(save_folder,'data.csv')
+    for i, diabetes in enumerate(scaled(counts)):
+        diabetes[diabetes_store.label] = diabetes[diabetes_store.label].astype(int)
+        diabetes.to_csv(save_path, index=False, header=i == 0, mode='w' if i == 0 else 'a')
+
+# Log raw and processed row counts
+run.log('raw_rows', counts['raw_rows'])
+run.log('processed_rows', counts['processed_rows'])
 
 # End the run
-run.complete()
\ No newline at end of file
+run.complete()
@@ -0,0 +1,43 @@
+# Import libraries
+from azureml.core import Run, Model
+import argparse
+import json
+import os
+import shutil
+
+# Get parameters
+parser = argparse.ArgumentParser()
+parser.add_argument('--candidates', type=str, nargs='+', dest='candidates', help='candidate model folders')
+args = parser.parse_args()
+
+# Get the experiment run context
+run = Run.get_context()
+
+# Read the metrics of every candidate model
+candidates = []
+for folder in args.candidates:
+    with open(os.path.join(folder, 'metrics.json')) as f:
+        metrics = json.load(f)
+    print('{}: AUC {:.4f}, Accuracy {:.4f}'.format(metrics['model'], metrics['AUC'], metrics['Accuracy']))
+    candidates.append((metrics, folder))
+
+# Pick the candidate with the best AUC
+metrics, folder = max(candidates, key=lambda candidate: candidate[0]['AUC'])
+print('Best model:', metrics['model'])
+run.log('best_model', metrics['model'])
+run.log('AUC', metrics['AUC'])
+run.log('Accuracy', metrics['Accuracy'])
+
+# Copy it to the outputs folder and register it (not when the script runs outside Azure ML, where there is no workspace)
+os.makedirs('outputs', exist_ok=True)
+for file_name in os.listdir(folder):
+    shutil.copy(os.path.join(folder, file_name), 'outputs')
+if not run.id.startswith('OfflineRun'):
+    print('Registering model...')
+    Model.register(workspace=run.experiment.workspace,
+                   model_path = 'outputs',
+                   model_name = 'diabetes_model',
+                   tags={'Training context':'Pipeline', 'Model type': metrics['model']},
+                   properties={'AUC': metrics['AUC'], 'Accuracy': metrics['Accuracy']})
+
+run.complete()
@@ -1,51 +1,72 @@
 # Import libraries
 from azureml.core import Run, Model
 import argparse
-import pandas as pd
+import json
 import numpy as np
 import joblib
 import os
+import shutil
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.metrics import roc_auc_score
 from sklearn.metrics import roc_curve
 import matplotlib.pyplot as plt
+from tree_engine import export_tree
+import diabetes_store
 
 # Get parameters
 parser = argparse.ArgumentParser()
 parser.add_argument("--training-data", type=str, dest='training_data', help='training data')
+parser.add_argument('--model', type=str, dest='model', default='decision_tree',
+                    choices=['decision_tree', 'logistic_regression', 'gradient_boosting'], help='model type')
+parser.add_argument('--reg_rate', type=float, dest='reg', default=0.01, help='logistic regression regularization rate')
+parser.add_argument('--learning_rate', type=float, dest='learning_rate', default=0.1, help='gradient boosting learning rate')
+parser.add_argument('--n_estimators', type=int, dest='n_estimators', default=100, help='gradient boosting estimators')
+parser.add_argument('--model-output', type=str, dest='model_output', default=None,
+                    help='Folder for a candidate model (registered by a later step instead of this one)')
 args = parser.parse_args()
 training_data = args.training_data
 
 # Get the experiment run context
 run = Run.get_context()
 
-# load the prepared data file in the training folder
+# load the prepared data file in the training folder as float32 features and 0/1 labels
 print("Loading Data...")
-file_path = os.path.join(training_data,'data.csv')
-diabetes = pd.read_csv(file_path)
-
-# Separate features and labels
-X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
+# (the prep step writes data.arrow, or data.csv when it is run with --prepped-format csv)
+file_path = os.path.join(training_data,'data.arrow')
+if not os.path.exists(file_path):
+    file_path = os.path.join(training_data,'data.csv')
+X, y = diabetes_store.load_xy(file_path, label_dtype=np.int8)
 
 # Split data into training set and test set
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
 
-# Train adecision tree model
-print('Training a decision tree model...')
-model = DecisionTreeClassifier().fit(X_train, y_train)
+# Train the requested model (the logistic regression and gradient boosting settings match 02 and 08)
+print('Training a {} model...'.format(args.model))
+if args.model == 'logistic_regression':
+    run.log('Regularization Rate', float(args.reg))
+    model = LogisticRegression(C=1/args.reg, solver="liblinear")
+elif args.model == 'gradient_boosting':
+    run.log('learning_rate', float(args.learning_rate))
+    run.log('n_estimators', int(args.n_estimators))
+    model = GradientBoostingClassifier(learning_rate=args.learning_rate, n_estimators=args.n_estimators)
+else:
+    model = DecisionTreeClassifier()
+model.fit(X_train, y_train)
 
 # calculate accuracy
 y_hat = model.predict(X_test)
 acc = np.average(y_hat == y_test)
 print('Accuracy:', acc)
-run.log('Accuracy', np.float(acc))
+run.log('Accuracy', float(acc))
 
 # calculate AUC
 y_scores = model.predict_proba(X_test)
 auc = roc_auc_score(y_test,y_scores[:,1])
 print('AUC: ' + str(auc))
-run.log('AUC', np.float(auc))
+run.log('AUC', float(auc))
 
 # plot ROC curve
 fpr, tpr, thresholds = roc_curve(y_test, y_scores[:,1])
@@ -60,19 +81,31 @@ plt.title('ROC Curve')
 run.log_image(name = "ROC", plot = fig)
 plt.show()
 
-# Save the trained model in the outputs folder
+# Save the trained model in the outputs folder, or the candidate folder (uncompressed, so the scoring scripts can memory-map it)
 print("Saving model...")
-os.makedirs('outputs', exist_ok=True)
-model_file = os.path.join('outputs', 'diabetes_model.pkl')
-joblib.dump(value=model, filename=model_file)
+model_folder = args.model_output or 'outputs'
+os.makedirs(model_folder, exist_ok=True)
+model_file = os.path.join(model_folder, 'diabetes_model.pkl')
+joblib.dump(value=model, filename=model_file, compress=0)
+# Save a tree as flat node arrays too, so the scoring scripts can use it without sklearn
+if args.model == 'decision_tree':
+    export_tree(model, os.path.join(model_folder, 'diabetes_model.npy'))
+# Keep the prep step's scaler with the model, so the scoring scripts apply the same transform before predicting
+scaler_path = os.path.join(training_data, 'diabetes_scaler.npy')
+if os.path.exists(scaler_path):
+    shutil.copy(scaler_path, os.path.join(model_folder, 'diabetes_scaler.npy'))
+# Save the metrics the compare step picks the best candidate by
+with open(os.path.join(model_folder, 'metrics.json'), 'w') as f:
+    json.dump({'model': args.model, 'AUC': float(auc), 'Accuracy': float(acc)}, f)
 
-# Register the model
-print('Registering model...')
-Model.register(workspace=run.experiment.workspace,
-               model_path = model_file,
-               model_name = 'diabetes_model',
-               tags={'Training context':'Pipeline'},
-               properties={'AUC': np.float(auc), 'Accuracy': np.float(acc)})
+# Register the model (not when a later step registers the best candidate, or outside Azure ML, where there is no workspace)
+if args.model_output is None and not run.id.startswith('OfflineRun'):
+    print('Registering model...')
+    Model.register(workspace=run.experiment.workspace,
+                   model_path = 'outputs',
+                   model_name = 'diabetes_model',
+                   tags={'Training context':'Pipeline'},
+                   properties={'AUC': float(auc), 'Accuracy': float(acc)})
 
 
 run.complete()
\ No newline at end of file
@@ -13,10 +13,20 @@ print(model.name, 'version', model.version)
 
 # Configure the scoring environment
 service_env = Environment(name='service-env')
-python_packages = ['scikit-learn', 'azureml-defaults', 'azure-ml-api-sdk'] # whatever packages your entry script uses
+python_packages = ['scikit-learn', 'azureml-defaults', 'azure-ml-api-sdk', 'pyarrow'] # whatever packages your entry script uses
 for package in python_packages:
     service_env.python.conda_dependencies.add_pip_package(package)
 
+# Uncomment to gather concurrent requests into one predict call (wait up to 2ms or 256 cases)
+# service_env.environment_variables = {'MICRO_BATCH_WAIT_MS': '2', 'MICRO_BATCH_SIZE': '256'}
+
+# Uncomment to score with the exported flat tree instead of sklearn (only faster for requests of a row or two)
+# service_env.environment_variables['MODEL_ENGINE'] = 'flat'
+
+# Uncomment to cache up to 100000 predictions for 5 minutes (GET on the scoring URI returns the hit/miss/eviction counters)
+# service_env.environment_variables['PREDICTION_CACHE_SIZE'] = '100000'
+# service_env.environment_variables['PREDICTION_CACHE_TTL'] = '300'
+
 # Represents configuration settings for a custom environment used for deployment
 inference_config = InferenceConfig(source_directory='./diabetes_service',
                                    entry_script='score_diabetes.py',
@@ -56,4 +56,27 @@ predictions = requests.post(endpoint, input_json, headers = headers)
 predicted_classes = json.loads(predictions.json())
 
 for i in range(len(x_new)):
-    print ("Patient {}".format(x_new[i]), predicted_classes[i] )
\ No newline at end of file
+    print ("Patient {}".format(x_new[i]), predicted_classes[i] )
+
+
+# Send the cases as a binary float32 matrix to skip JSON parsing on large payloads
+from diabetes_client import encode_payload, decode_predictions, NPY
+
+headers = { 'Content-Type':NPY, 'Accept':NPY }
+
+response = requests.post(endpoint, encode_payload(x_new, NPY), headers = headers)
+predicted_classes = decode_predictions(response.content, response.headers.get('Content-Type'))
+
+for i in range(len(x_new)):
+    print ("Patient {}".format(x_new[i]), predicted_classes[i] )
+
+
+# Score many cases at once: batches of rows, several requests in flight over pooled connections, retried on failure
+import sys
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+from diabetes_client import predict_all
+
+cases, _ = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv')
+predicted_classes = predict_all(endpoint, cases, batch_size=4096, max_in_flight=8)
+print(len(predicted_classes), 'patients scored,', (predicted_classes == 'diabetic').sum(), 'diabetic')
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+import timeit
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Train a local copy of the diabetes model (no workspace needed)
+print("Training local model...")
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+model_dir = tempfile.mkdtemp()
+joblib.dump(value=DecisionTreeClassifier().fit(X, y), filename=os.path.join(model_dir, 'diabetes_model.pkl'))
+
+# Load the entry script the same way the service does
+# (the rawhttp decorator comes from the azureml-inference-server-http package)
+os.environ['AZUREML_MODEL_DIR'] = model_dir
+sys.path.insert(0, './diabetes_service')
+import score_diabetes
+score_diabetes.init()
+
+# The original per-row implementation, kept here as the baseline
+def run_per_row(raw_data):
+    data = np.array(json.loads(raw_data)['data'])
+    predictions = score_diabetes.model.predict(data)
+    classnames = ['not-diabetic', 'diabetic']
+    predicted_classes = []
+    for prediction in predictions:
+        predicted_classes.append(classnames[prediction])
+    return json.dumps(predicted_classes)
+
+# Compare rows/sec for different request sizes
+print('{:>8} {:>16} {:>16} {:>16}'.format('rows', 'per-row run', 'batch run', 'predict_classes'))
+for rows in [1, 100, 10000]:
+    cases = X[np.random.randint(0, len(X), rows)]
+    raw_data = json.dumps({"data": cases.tolist()})
+    cases32 = np.ascontiguousarray(cases, dtype=np.float32)
+    assert run_per_row(raw_data) == score_diabetes.score(raw_data)[0]
+
+    repeats = max(1, 20000 // rows)
+    timings = [min(timeit.repeat(fn, number=repeats, repeat=3)) / repeats
+               for fn in (lambda: run_per_row(raw_data),
+                          lambda: score_diabetes.score(raw_data),
+                          lambda: score_diabetes.predict_classes(cases32))]
+    print('{:>8} {:>16,.0f} {:>16,.0f} {:>16,.0f}'.format(rows, *[rows / t for t in timings]))
+print('(rows/sec)')
+
+# Compare request formats end to end (decode, predict, encode)
+from diabetes_client import encode_payload, JSON, RAW, NPY, ARROW
+formats = [('json', JSON), ('raw float32', RAW), ('npy', NPY), ('arrow', ARROW)]
+print('{:>8}'.format('rows') + ''.join('{:>16}'.format(name) for name, _ in formats))
+for rows in [1, 100, 10000]:
+    cases = X[np.random.randint(0, len(X), rows)]
+    rates = []
+    for _, content_type in formats:
+        body = encode_payload(cases, content_type)
+        repeats = max(1, 20000 // rows)
+        t = min(timeit.repeat(lambda: score_diabetes.score(body, content_type, content_type), number=repeats, repeat=3)) / repeats
+        rates.append(rows / t)
+    print('{:>8}'.format(rows) + ''.join('{:>16,.0f}'.format(r) for r in rates))
+print('(rows/sec)')
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Settings for the load generator
+clients = 32           # concurrent callers, like the inference server's worker threads
+duration = 5.0         # seconds per scenario
+rows_per_request = 1   # one patient per request
+
+# Train a local copy of the diabetes model (no workspace needed)
+print("Training local model...")
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+model_dir = tempfile.mkdtemp()
+joblib.dump(value=DecisionTreeClassifier().fit(X, y), filename=os.path.join(model_dir, 'diabetes_model.pkl'))
+
+# Load the entry script the same way the service does
+# (the rawhttp decorator comes from the azureml-inference-server-http package)
+os.environ['AZUREML_MODEL_DIR'] = model_dir
+sys.path.insert(0, './diabetes_service')
+import score_diabetes
+
+# Send requests from concurrent clients for a while and record each latency
+def generate_load():
+    latencies = []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(seed):
+        rng = np.random.RandomState(seed)
+        own = []
+        while time.monotonic() < stop:
+            body = json.dumps({"data": X[rng.randint(0, len(X), rows_per_request)].tolist()})
+            start = time.perf_counter()
+            score_diabetes.score(body)
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+# Compare the per-request path with a few micro-batching settings
+scenarios = [('per-request', None, None), ('batch 1ms/64', '1', '64'), ('batch 2ms/256', '2', '256'), ('batch 5ms/1024', '5', '1024')]
+print('{} clients, {} row(s) per request, {}s per scenario'.format(clients, rows_per_request, duration))
+print('{:>16} {:>12} {:>10} {:>10}'.format('scenario', 'requests/s', 'p50 ms', 'p99 ms'))
+for name, wait_ms, batch_size in scenarios:
+    os.environ.pop('MICRO_BATCH_WAIT_MS', None)
+    if wait_ms:
+        os.environ['MICRO_BATCH_WAIT_MS'] = wait_ms
+        os.environ['MICRO_BATCH_SIZE'] = batch_size
+    score_diabetes.init()
+    throughput, p50, p99 = generate_load()
+    print('{:>16} {:>12,.0f} {:>10.2f} {:>10.2f}'.format(name, throughput, p50, p99))
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+sys.path.insert(0, './diabetes_service')
+from tree_engine import export_tree
+
+# Number of worker processes to start, like gunicorn workers on one node
+workers = 8
+
+
+# Read this process's resident and proportional (shared pages split between processes) memory in MB
+def memory_mb():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Rss:', 'Pss:')):
+                name, size, _ = line.split()
+                values[name[:-1]] = int(size) / 1024
+    return values['Rss'], values['Pss']
+
+
+# Load the entry script in a fresh process, report, then stay alive until every worker has loaded
+def worker(model_dir, mmap_mode, engine, results, done):
+    os.environ['AZUREML_MODEL_DIR'] = model_dir
+    os.environ['MODEL_MMAP_MODE'] = mmap_mode
+    os.environ['MODEL_ENGINE'] = engine
+    import score_diabetes
+    start = time.perf_counter()
+    score_diabetes.init()
+    startup = time.perf_counter() - start
+    score_diabetes.predict(np.zeros((1, 8)))
+    rss, pss = memory_mb()
+    results.put((startup, rss, pss))
+    done.wait()
+
+
+if __name__ == '__main__':
+    # Train a local copy of the diabetes model (no workspace needed)
+    print("Training local model...")
+    X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+    model_dir = tempfile.mkdtemp()
+    model_file = os.path.join(model_dir, 'diabetes_model.pkl')
+    model = DecisionTreeClassifier().fit(X, y)
+    joblib.dump(value=model, filename=model_file, compress=0)
+    flat_model_file = export_tree(model, os.path.join(model_dir, 'diabetes_model.npy'))
+    print('Model file: {:.2f} MB, flat tree file: {:.2f} MB'.format(os.path.getsize(model_file) / 2**20,
+                                                                   os.path.getsize(flat_model_file) / 2**20))
+
+    # Start the workers with each loading mode (spawned, so nothing is inherited from this process)
+    context = multiprocessing.get_context('spawn')
+    print('{:>8} {:>10} {:>8} {:>16} {:>14} {:>14}'.format('engine', 'mmap_mode', 'workers', 'mean startup ms', 'total RSS MB', 'total PSS MB'))
+    for engine, mmap_mode in [('sklearn', ''), ('sklearn', 'r'), ('flat', ''), ('flat', 'r')]:
+        results, done = context.Queue(), context.Event()
+        processes = [context.Process(target=worker, args=(model_dir, mmap_mode, engine, results, done)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        reports = np.array([results.get() for _ in processes])
+        done.set()
+        for process in processes:
+            process.join()
+        print('{:>8} {:>10} {:>8} {:>16.1f} {:>14.1f} {:>14.1f}'.format(engine, mmap_mode or 'None', workers,
+                                                                         reports[:, 0].mean() * 1000,
+                                                                         reports[:, 1].sum(), reports[:, 2].sum()))
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import timeit
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+sys.path.insert(0, './diabetes_service')
+from tree_engine import export_tree, FlatTree
+
+# Train a local copy of the diabetes model (no workspace needed)
+print("Training local model...")
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+model = DecisionTreeClassifier().fit(X_train, y_train)
+
+# Export the tree and load it back memory-mapped
+flat_path = export_tree(model, os.path.join(tempfile.mkdtemp(), 'diabetes_model.npy'))
+flat_model = FlatTree.load(flat_path)
+print('Nodes: {}, depth: {}, file: {:.1f} KB'.format(model.tree_.node_count, model.get_depth(), os.path.getsize(flat_path) / 1024))
+
+# Check parity on the test set, on random cases across the feature ranges and on exact split thresholds
+rng = np.random.RandomState(0)
+random_cases = rng.uniform(X.min(axis=0), X.max(axis=0), size=(100000, X.shape[1]))
+threshold_cases = X_test[rng.randint(0, len(X_test), model.tree_.node_count)].copy()
+internal = model.tree_.children_left != -1
+threshold_cases[internal, model.tree_.feature[internal]] = model.tree_.threshold[internal]
+for name, cases in [('test set', X_test), ('random cases', random_cases), ('threshold cases', threshold_cases)]:
+    cases = cases.astype(np.float32)
+    assert np.array_equal(flat_model.apply(cases), model.apply(cases)), name
+    assert np.array_equal(flat_model.predict(cases), model.predict(cases)), name
+    assert np.allclose(flat_model.predict_proba(cases), model.predict_proba(cases)), name
+    print('Parity OK:', name, len(cases), 'cases')
+
+# Compare rows/sec for different batch sizes
+print('{:>8} {:>20} {:>20}'.format('rows', 'sklearn predict', 'flat tree predict'))
+for rows in [1, 10, 100, 10000, 100000]:
+    cases = np.ascontiguousarray(random_cases[:rows], dtype=np.float32)
+    repeats = max(1, 20000 // rows)
+    timings = [min(timeit.repeat(lambda: m.predict(cases), number=repeats, repeat=3)) / repeats
+               for m in (model, flat_model)]
+    print('{:>8} {:>20,.0f} {:>20,.0f}'.format(rows, *[rows / t for t in timings]))
+print('(rows/sec)')
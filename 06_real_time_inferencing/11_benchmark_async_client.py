@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+import requests
+from sklearn.tree import DecisionTreeClassifier
+from diabetes_client import ScoringClient, JSON, NPY
+from local_service import LocalService
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Settings for the replay
+workers = 1                # inference server worker processes
+per_request_cases = 500    # cases sent one request each (that path is too slow for the whole day)
+replay_copies = 10         # a day's patients: the sample repeated
+
+# Train a local copy of the diabetes model (no workspace needed)
+print("Training local model...")
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+model_dir = tempfile.mkdtemp()
+joblib.dump(value=DecisionTreeClassifier().fit(X, y), filename=os.path.join(model_dir, 'diabetes_model.pkl'))
+cases = np.tile(X, (replay_copies, 1))
+
+
+# The way 05_make_predictions.py calls the service: one requests.post per payload, a new connection each time
+def post_each(endpoint, cases):
+    return np.array([json.loads(requests.post(endpoint, json.dumps({"data": [case.tolist()]}),
+                                              headers={'Content-Type': JSON}).json())[0] for case in cases])
+
+
+async def replay(endpoint, cases, batch_size, max_in_flight, content_type=NPY):
+    async with ScoringClient(endpoint, batch_size=batch_size, max_in_flight=max_in_flight,
+                             content_type=content_type) as client:
+        return await client.predict(cases)
+
+
+with LocalService(model_dir, workers=workers) as service:
+    endpoint = service.scoring_uri
+    print('{} cases, {} server worker(s)'.format(len(cases), workers))
+    print('{:>36} {:>10} {:>12}'.format('client', 'seconds', 'cases/s'))
+
+    start = time.perf_counter()
+    expected = post_each(endpoint, cases[:per_request_cases])
+    seconds = time.perf_counter() - start
+    print('{:>36} {:>10.2f} {:>12,.0f}'.format('requests.post per case ({})'.format(per_request_cases),
+                                               seconds, per_request_cases / seconds))
+
+    # (one row per request is only timed on the same cases as the per-case baseline)
+    for n, batch_size, max_in_flight, content_type in [(per_request_cases, 1, 8, JSON), (len(cases), 256, 1, JSON),
+                                                       (len(cases), 256, 8, JSON), (len(cases), 256, 8, NPY),
+                                                       (len(cases), 4096, 8, NPY)]:
+        start = time.perf_counter()
+        predictions = asyncio.run(replay(endpoint, cases[:n], batch_size, max_in_flight, content_type))
+        seconds = time.perf_counter() - start
+        name = 'async {} rows x {} in flight, {}'.format(batch_size, max_in_flight, content_type.split('/')[-1])
+        print('{:>36} {:>10.2f} {:>12,.0f}'.format(name, seconds, n / seconds))
+        # The predictions come back in the order of the cases
+        assert (predictions[:per_request_cases] == expected).all() and len(predictions) == n
+
+    async def tune():
+        async with ScoringClient(endpoint, max_in_flight=8) as client:
+            rates = await client.tune_batch_size(cases)
+            return client.batch_size, rates
+    batch_size, rates = asyncio.run(tune())
+    print('Tuned batch size: {} ({})'.format(batch_size, ', '.join('{}: {:,.0f}/s'.format(*rate)
+                                                                    for rate in rates.items())))
@@ -0,0 +1,152 @@
+import asyncio
+import io
+import json
+import random
+import time
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Content types understood by diabetes_service/score_diabetes.py
+JSON = 'application/json'
+RAW = 'application/octet-stream'
+NPY = 'application/x-npy'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+classnames = np.array(['not-diabetic', 'diabetic'])
+
+
+# Encode an array of cases as a request body of the given content type
+def encode_payload(x_new, content_type=JSON):
+    if content_type == JSON:
+        return json.dumps({"data": np.asarray(x_new).tolist()})
+    # Binary formats carry little-endian float32 rows
+    data = np.ascontiguousarray(x_new, dtype='<f4')
+    if content_type == RAW:
+        return data.tobytes()
+    if content_type == NPY:
+        stream = io.BytesIO()
+        np.save(stream, data)
+        return stream.getvalue()
+    if content_type == ARROW:
+        if pa is None:
+            raise ValueError('Arrow payloads need pyarrow installed')
+        # One fixed-size list column, so the service can view the rows without copying
+        values = pa.array(data.reshape(-1))
+        rows = pa.FixedSizeListArray.from_arrays(values, data.shape[1])
+        batch = pa.RecordBatch.from_arrays([rows], ['data'])
+        sink = pa.BufferOutputStream()
+        writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        writer.close()
+        return sink.getvalue().to_pybytes()
+    raise ValueError('Unsupported content type: {}'.format(content_type))
+
+
+# Decode a response body into an array of predicted classnames
+def decode_predictions(content, content_type=JSON):
+    content_type = (content_type or JSON).split(';')[0].strip()
+    if content_type == RAW:
+        return classnames.take(np.frombuffer(content, dtype=np.uint8))
+    if content_type == NPY:
+        return classnames.take(np.load(io.BytesIO(content)))
+    # The JSON response is a JSON-encoded string holding the list of classnames
+    return np.array(json.loads(json.loads(content)))
+
+
+# Responses worth retrying: throttled, or the service busy or restarting
+retry_statuses = {429, 500, 502, 503, 504}
+
+
+# Async client for scoring many cases: the cases are split into batches of batch_size rows, and up to max_in_flight
+# batches are sent at once over a pool of kept-alive connections. A failed request is retried with exponential
+# backoff and jitter, and the predictions come back in the order of the cases.
+#
+#     async with ScoringClient(service.scoring_uri, headers={'Authorization': 'Bearer ' + key}) as client:
+#         predictions = await client.predict(cases)
+class ScoringClient:
+
+    def __init__(self, endpoint, batch_size=256, max_in_flight=8, content_type=NPY, headers=None, retries=4,
+                 backoff=0.1, timeout=60):
+        if aiohttp is None:
+            raise ValueError('The scoring client needs aiohttp installed')
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.content_type = content_type
+        self.headers = dict(headers or {}, **{'Content-Type': content_type, 'Accept': content_type})
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = None
+        self.requests = 0
+        self.retried = 0
+
+    async def __aenter__(self):
+        # One connection per request in flight, kept open between requests
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    # Send one batch, retrying failed attempts
+    async def post(self, cases):
+        body = encode_payload(cases, self.content_type)
+        for attempt in range(self.retries + 1):
+            self.requests += 1
+            try:
+                async with self.session.post(self.endpoint, data=body, headers=self.headers) as response:
+                    if response.status == 200:
+                        return decode_predictions(await response.read(), response.headers.get('Content-Type'))
+                    if response.status not in retry_statuses or attempt == self.retries:
+                        raise ValueError('Scoring failed with status {}: {}'.format(response.status,
+                                                                                   await response.text()))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            self.retried += 1
+            await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    # Get the predicted classnames of all the cases, in order
+    async def predict(self, cases, batch_size=None):
+        cases = np.asarray(cases)
+        batch_size = batch_size or self.batch_size
+        predictions = np.empty(len(cases), dtype=classnames.dtype)
+        starts = iter(range(0, len(cases), batch_size))
+
+        # Each worker keeps one request in flight, taking the next batch when it gets an answer
+        async def worker():
+            for start in starts:
+                predictions[start:start + batch_size] = await self.post(cases[start:start + batch_size])
+
+        await asyncio.gather(*[worker() for _ in range(self.max_in_flight)])
+        return predictions
+
+    # Time a sample of the cases at each batch size, and keep the size that scores the most cases a second
+    async def tune_batch_size(self, cases, batch_sizes=(16, 64, 256, 1024, 4096)):
+        rates = {}
+        for batch_size in batch_sizes:
+            sample = cases[:batch_size * self.max_in_flight * 2]
+            start = time.perf_counter()
+            await self.predict(sample, batch_size)
+            rates[batch_size] = len(sample) / (time.perf_counter() - start)
+        self.batch_size = max(rates, key=rates.get)
+        return rates
+
+
+# Score all the cases from synchronous code
+def predict_all(endpoint, cases, **kwargs):
+    async def run():
+        async with ScoringClient(endpoint, **kwargs) as client:
+            return await client.predict(cases)
+    return asyncio.run(run())
@@ -0,0 +1,52 @@
+import numpy as np
+
+# One record per model feature: scaled = value * scale + offset (features that were not scaled keep 1 and 0)
+scaler_dtype = np.dtype([('feature', 'U32'), ('scale', '<f8'), ('offset', '<f8')])
+
+
+# Save a fitted sklearn MinMaxScaler as a single .npy file of per-feature records
+def export_scaler(scaler, scaled_columns, features, path):
+    records = np.empty(len(features), dtype=scaler_dtype)
+    records['feature'] = features
+    records['scale'] = 1.0
+    records['offset'] = 0.0
+    positions = [features.index(column) for column in scaled_columns]
+    records['scale'][positions] = scaler.scale_
+    records['offset'][positions] = scaler.min_
+    np.save(path, records)
+    return path
+
+
+# Applies the saved scaling to whole batches as one vectorized affine transform
+class AffineScaler:
+
+    def __init__(self, records):
+        records = records.view(np.ndarray)
+        self.features = list(records['feature'])
+        self.scale = records['scale']
+        self.offset = records['offset']
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        return cls(np.load(path, mmap_mode=mmap_mode))
+
+    # Scale in float64, like MinMaxScaler does, before giving the result the requested type
+    def transform(self, X, dtype=np.float32):
+        scaled = np.multiply(X, self.scale, dtype=np.float64)
+        scaled += self.offset
+        return scaled.astype(dtype, copy=False)
+
+
+# Wraps a model so every predict call scales its input first
+class ScaledModel:
+
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.scaler.transform(X))
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(X))
@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+# Gathers the cases sent by concurrent requests and scores them with one predict call
+class MicroBatcher:
+
+    def __init__(self, predict, max_batch_size=256, max_wait_ms=2.0, timeout_s=30.0):
+        self.predict_batch = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout_s
+        self.requests = queue.Queue()
+        # Set by stop(): requests are then scored by their own thread (the lock keeps them all ahead of the sentinel)
+        self.closed = False
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._serve, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    # Let the requests already queued finish, then end the worker thread
+    def stop(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.requests.put(None)
+        self.worker.join()
+
+    # Called by each request: blocks until its own slice of the batch predictions is ready
+    # (or raises concurrent.futures.TimeoutError after timeout_s)
+    def predict(self, data):
+        future = Future()
+        with self.lock:
+            queued = not self.closed
+            if queued:
+                self.requests.put((data, future))
+        if not queued:
+            return self.predict_batch(data)
+        return future.result(timeout=self.timeout)
+
+    def _serve(self):
+        while True:
+            # Wait for the first request, then keep collecting until the window closes or the batch is full
+            batch = [self.requests.get()]
+            if batch[0] is None:
+                return self._drain()
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._score(batch)
+                    return self._drain()
+                batch.append(request)
+                rows += len(batch[-1][0])
+            self._score(batch)
+
+    # Score anything still queued behind the stop sentinel, so no caller is left waiting
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                batch.append(request)
+        if batch:
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            data = batch[0][0] if len(batch) == 1 else np.concatenate([data for data, _ in batch])
+            predictions = self.predict_batch(data)
+        except Exception as ex:
+            if len(batch) == 1:
+                batch[0][1].set_exception(ex)
+            else:
+                # Score each request on its own, so only the request that caused the error gets it
+                for request in batch:
+                    self._score([request])
+            return
+        # Hand each caller back the rows it sent
+        start = 0
+        for data, future in batch:
+            future.set_result(predictions[start:start + len(data)])
+            start += len(data)
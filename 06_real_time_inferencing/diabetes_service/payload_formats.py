@@ -0,0 +1,82 @@
+import io
+import json
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Content types understood by the scoring service
+JSON = 'application/json'
+RAW = 'application/octet-stream'  # requests: little-endian float32, row-major; responses: uint8 class indices
+NPY = 'application/x-npy'
+ARROW = 'application/vnd.apache.arrow.stream'
+content_types = (JSON, RAW, NPY, ARROW)
+
+n_features = 8
+
+
+# Strip parameters such as "; charset=utf-8" from a content type header
+def media_type(header, default=JSON):
+    if not header:
+        return default
+    return header.split(';')[0].strip().lower()
+
+
+# Decode a request body into the 2-dimensional array passed to predict
+def decode(body, content_type=JSON):
+    content_type = media_type(content_type)
+    if content_type == JSON:
+        return np.asarray(json.loads(body)['data'], dtype=np.float32)
+    if content_type == RAW:
+        # Use the request buffer as-is (no copy)
+        return np.frombuffer(body, dtype='<f4').reshape(-1, n_features)
+    if content_type == NPY:
+        return decode_npy(body)
+    if content_type == ARROW:
+        return decode_arrow(body)
+    raise ValueError('Unsupported content type: {}'.format(content_type))
+
+
+def decode_npy(body):
+    # Read the NPY header, then view the array data in place
+    stream = io.BytesIO(body)
+    version = np.lib.format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    count = int(np.prod(shape))
+    data = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    return data.reshape(shape, order='F' if fortran_order else 'C')
+
+
+def decode_arrow(body):
+    if pa is None:
+        raise ValueError('Arrow payloads need pyarrow installed in the service environment')
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    # A single fixed-size list<float32> column maps straight onto a row-major matrix
+    if table.num_columns == 1 and pa.types.is_fixed_size_list(table.column(0).type):
+        chunks = [decode_arrow_chunk(chunk) for chunk in table.column(0).chunks]
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    # Otherwise expect one column per feature
+    return np.column_stack([table.column(i).to_numpy() for i in range(table.num_columns)])
+
+
+def decode_arrow_chunk(rows):
+    # The flattened float32 values of a chunk without nulls are viewed, not copied
+    return rows.flatten().to_numpy(zero_copy_only=False).reshape(len(rows), rows.type.list_size)
+
+
+# Encode the predicted class indices in the format asked for by the Accept header
+def encode_predictions(predictions, classnames, accept=JSON):
+    accept = media_type(accept)
+    if accept == RAW:
+        return np.asarray(predictions, dtype=np.uint8).tobytes(), RAW
+    if accept == NPY:
+        stream = io.BytesIO()
+        np.save(stream, np.asarray(predictions, dtype=np.uint8))
+        return stream.getvalue(), NPY
+    # Default to the JSON list of classnames
+    return json.dumps(classnames.take(predictions).tolist()), JSON
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+# Bounded LRU cache of predictions keyed on the quantized feature row, with a time-to-live per entry
+class PredictionCache:
+
+    def __init__(self, max_size=100000, ttl_seconds=300.0, decimals=6):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.decimals = decimals
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.model_token = None
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    # Drop every entry when a different model is loaded
+    def bind(self, model_token):
+        with self.lock:
+            if model_token != self.model_token:
+                self.entries.clear()
+                self.model_token = model_token
+
+    # Rows that round to the same values share a key (the dict hashes the row bytes)
+    def keys(self, data):
+        quantized = np.round(data, self.decimals) + 0.0  # adding 0.0 turns -0.0 into 0.0
+        return [row.tobytes() for row in np.ascontiguousarray(quantized)]
+
+    # Get the predictions for all rows, calling predict only for the rows that are not cached
+    def predict(self, data, predict):
+        keys = self.keys(data)
+        predictions = [None] * len(keys)
+        missing = []
+        now = time.monotonic()
+        with self.lock:
+            for i, key in enumerate(keys):
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] < now:
+                    del self.entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(i)
+                else:
+                    self.entries.move_to_end(key)
+                    predictions[i] = entry[0]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            new_predictions = predict(data[missing])
+            expires = time.monotonic() + self.ttl
+            with self.lock:
+                for i, prediction in zip(missing, new_predictions):
+                    predictions[i] = prediction
+                    self.entries[keys[i]] = (prediction, expires)
+                    self.entries.move_to_end(keys[i])
+                # Evict the least recently used entries beyond the size limit
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+        return np.array(predictions)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'expirations': self.expirations,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
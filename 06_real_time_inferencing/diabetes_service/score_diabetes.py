@@ -1,25 +1,119 @@
-import json
 import joblib
+import json
 import numpy as np
 import os
+try:
+    from azureml.contrib.services.aml_request import rawhttp
+    from azureml.contrib.services.aml_response import AMLResponse
+except ImportError:
+    # Newer inference servers only alias azureml.contrib once the server itself is loaded (not in local benchmarks)
+    from azureml_inference_server_http.api.aml_request import rawhttp
+    from azureml_inference_server_http.api.aml_response import AMLResponse
+import payload_formats
+from micro_batching import MicroBatcher
+from prediction_cache import PredictionCache
+from tree_engine import FlatTree
+from feature_scaler import AffineScaler, ScaledModel
+
+# Lookup array with the classname for each prediction (0 or 1)
+classnames = np.array(['not-diabetic', 'diabetic'])
+
+# Optional prediction cache, kept across init calls so a new model can invalidate it
+cache = None
+batcher = None
 
 # Called when the service is loaded
 def init():
-    global model
+    global model, batcher, cache
     # Get the path to the deployed model file and load it
-    model_path = os.path.join(os.getenv('AZUREML_MODEL_DIR'), 'diabetes_model.pkl')
-    model = joblib.load(model_path)
+    # (arrays in the model files are memory-mapped, so worker processes share them through the page cache)
+    model_dir = os.getenv('AZUREML_MODEL_DIR')
+    mmap_mode = os.getenv('MODEL_MMAP_MODE', 'r') or None
+    flat_path = find_model_file(model_dir, 'diabetes_model.npy')
+    if flat_path and os.getenv('MODEL_ENGINE') == 'flat':
+        # Use the exported flat tree when asked for and the model was registered with one
+        model_file = flat_path
+        model = FlatTree.load(model_file, mmap_mode=mmap_mode)
+    else:
+        model_file = find_model_file(model_dir, 'diabetes_model.pkl')
+        model = joblib.load(model_file, mmap_mode=mmap_mode)
+    # Models trained on scaled features are registered with the scaler, which then runs before every predict
+    scaler_path = find_model_file(model_dir, 'diabetes_scaler.npy')
+    if scaler_path:
+        model = ScaledModel(model, AffineScaler.load(scaler_path))
+    # Optionally cache predictions for repeated cases, clearing them whenever the model changes
+    if os.getenv('PREDICTION_CACHE_SIZE'):
+        if cache is None:
+            cache = PredictionCache(max_size=int(os.getenv('PREDICTION_CACHE_SIZE')),
+                                    ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', '300')),
+                                    decimals=int(os.getenv('PREDICTION_CACHE_DECIMALS', '6')))
+        model_stat = os.stat(model_file)
+        cache.bind((os.path.realpath(model_file), model_stat.st_mtime, model_stat.st_size))
+    # Optionally gather concurrent requests into one predict call (replacing the worker thread of an earlier init)
+    previous, batcher = batcher, None
+    if os.getenv('MICRO_BATCH_WAIT_MS'):
+        batcher = MicroBatcher(predict,
+                               max_batch_size=int(os.getenv('MICRO_BATCH_SIZE', '256')),
+                               max_wait_ms=float(os.getenv('MICRO_BATCH_WAIT_MS')),
+                               timeout_s=float(os.getenv('MICRO_BATCH_TIMEOUT_S', '30')))
+    if previous is not None:
+        previous.stop()
+
+# Find a model file in the model folder (models registered from a folder keep it as a subfolder)
+def find_model_file(model_dir, file_name):
+    for root, dirs, files in os.walk(model_dir):
+        if file_name in files:
+            return os.path.join(root, file_name)
+    return None
+
+# Get the cases as a 2-dimensional float32 array
+def as_cases(data):
+    # The tree works on float32 internally, so a contiguous float32 array avoids a copy in predict
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    if data.ndim == 1:
+        data = data.reshape(1, -1)
+    if data.ndim != 2 or data.shape[1] != payload_formats.n_features:
+        raise ValueError('Expected cases with {} features'.format(payload_formats.n_features))
+    # Reject NaN and infinity here, before the cases can share a micro-batch with other requests
+    if not np.isfinite(data).all():
+        raise ValueError('Expected finite feature values')
+    return data
+
+# Score a whole batch of cases at once and return the predicted class indices
+def predict(data):
+    # Get a prediction for every case in a single call
+    return model.predict(as_cases(data))
+
+# Score a whole batch of cases at once and return the predicted classnames
+def predict_classes(data):
+    # Map all predictions to their classnames with one array lookup
+    return classnames.take(predict(data))
+
+# Decode a request body, score it and encode the response
+def score(body, content_type=payload_formats.JSON, accept=payload_formats.JSON):
+    data = as_cases(payload_formats.decode(body, content_type))
+    predict_cases = batcher.predict if batcher else predict
+    predictions = cache.predict(data, predict_cases) if cache else predict_cases(data)
+    return payload_formats.encode_predictions(predictions, classnames, accept)
 
 # Called when a request is received
-def run(raw_data):
-    # Get the input data as a numpy array
-    data = np.array(json.loads(raw_data)['data'])
-    # Get a prediction from the model
-    predictions = model.predict(data)
-    # Get the corresponding classname for each prediction (0 or 1)
-    classnames = ['not-diabetic', 'diabetic']
-    predicted_classes = []
-    for prediction in predictions:
-        predicted_classes.append(classnames[prediction])
-    # Return the predictions as JSON
-    return json.dumps(predicted_classes)
\ No newline at end of file
+@rawhttp
+def run(request):
+    # A GET request returns the prediction cache counters
+    if request.method == 'GET':
+        return AMLResponse(json.dumps(cache.stats() if cache else {}), 200, {'Content-Type': payload_formats.JSON})
+    if request.method != 'POST':
+        return AMLResponse('Send the cases to score in a POST request', 405)
+    content_type = payload_formats.media_type(request.headers.get('Content-Type'))
+    if content_type not in payload_formats.content_types:
+        return AMLResponse('Unsupported content type: {}'.format(content_type), 415)
+    # Get the input data in the format given by the Content-Type header
+    try:
+        body, content_type = score(request.get_data(cache=False), content_type,
+                                   request.headers.get('Accept'))
+    except ValueError as ex:
+        return AMLResponse(str(ex), 400)
+    # JSON predictions are returned as before, binary ones as raw bytes
+    if content_type == payload_formats.JSON:
+        return body
+    return AMLResponse(body, 200, {'Content-Type': content_type})
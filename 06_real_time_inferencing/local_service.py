@@ -0,0 +1,66 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import requests
+
+# Local stand-in for the deployed service: the Azure ML inference server (azmlinfsrv, from the
+# azureml-inference-server-http package) running diabetes_service/score_diabetes.py on this machine,
+# with the model files in model_dir. Use it as a context manager:
+#
+#     with LocalService(model_dir) as service:
+#         requests.post(service.scoring_uri, ...)
+class LocalService:
+
+    def __init__(self, model_dir, source_directory='./diabetes_service', entry_script='score_diabetes.py',
+                 workers=1, env=None):
+        self.model_dir = os.path.abspath(model_dir)
+        self.source_directory = os.path.abspath(source_directory)
+        self.entry_script = entry_script
+        self.workers = workers
+        self.env = env or {}
+        self.process = None
+        self.port = None
+
+    @property
+    def scoring_uri(self):
+        return 'http://127.0.0.1:{}/score'.format(self.port)
+
+    def start(self, timeout=60):
+        # Take a free port
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        env = dict(os.environ, AZUREML_MODEL_DIR=self.model_dir, WORKER_COUNT=str(self.workers),
+                   PYTHONPATH=self.source_directory, **self.env)
+        server = os.path.join(os.path.dirname(sys.executable), 'azmlinfsrv')
+        self.process = subprocess.Popen([server, '--entry_script', self.entry_script, '--port', str(self.port)],
+                                        cwd=self.source_directory, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Wait until the liveness route answers
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('The inference server exited with code {}'.format(self.process.returncode))
+            try:
+                if requests.get('http://127.0.0.1:{}/'.format(self.port), timeout=1).ok:
+                    return self
+            except (requests.ConnectionError, requests.Timeout):
+                # (the port accepts connections before the worker has loaded the entry script)
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError('The inference server did not start in {} s'.format(timeout))
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,13 +1,17 @@
 from azureml.core import Workspace, Experiment
 from azureml.core import Model
-import pandas as pd
 import numpy as np
 import joblib
+import sys
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import roc_auc_score
 from sklearn.metrics import roc_curve
 
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
 # Load the workspace from the saved config file
 ws = Workspace.from_config()
 
@@ -16,12 +20,10 @@ experiment = Experiment(workspace=ws, name='mslearn-train-diabetes')
 run = experiment.start_logging()
 print("Starting experiment:", experiment.name)
 
-# load the diabetes dataset
+# load the diabetes dataset as float32 features and 0/1 labels
+# (diabetes.csv is parsed once into a columnar cache and memory-mapped after that)
 print("Loading Data...")
-diabetes = pd.read_csv('../03_azure_work_with_data/data/diabetes.csv')
-
-# Separate features and labels
-X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
 
 # Split data into training set and test set
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
@@ -42,16 +44,16 @@ auc = roc_auc_score(y_test,y_scores[:,1])
 print('AUC: ' + str(auc))
 run.log('AUC', np.float(auc))
 
-# Save the trained model
+# Save the trained model (uncompressed, so the scoring scripts can memory-map it)
 model_file = 'diabetes_model.pkl'
-joblib.dump(value=model, filename=model_file)
+joblib.dump(value=model, filename=model_file, compress=0)
 run.upload_file(name = 'outputs/' + model_file, path_or_stream = './' + model_file)
 
 # Complete the run
 run.complete()
 
 # Register the model
-run.register_model(model_path='outputs/diabetes_model.pkl', model_name='diabetes_model',
+run.register_model(model_path='outputs', model_name='diabetes_model',
                    tags={'Training context':'Inline Training'},
                    properties={'AUC': run.get_metrics()['AUC'], 'Accuracy': run.get_metrics()['Accuracy']})
 
@@ -1,6 +1,19 @@
 from azureml.core import Workspace, Datastore, Dataset
-import pandas as pd
+import numpy as np
 import os
+import sys
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+sys.path.insert(0, '../03_azure_work_with_data')
+from datastore_upload import BlobDatastore, upload
+
+# Write one CSV file per patient ('csv'), or pack many patients per shard with a row id ('parquet' or 'npy')
+batch_format = 'csv'
+sample_size = 100
+rows_per_shard = 1000000
+row_group_size = 65536
 
 # Load the workspace from the saved config file
 ws = Workspace.from_config()
@@ -13,33 +26,59 @@ default_ds = ws.get_default_datastore()
 for ds_name in ws.datastores:
     print(ds_name, "- Default =", ds_name == default_ds.name)
 
-# Load the diabetes data
-diabetes = pd.read_csv('../03_azure_work_with_data/data/diabetes.csv')
-# Get a 100-item sample of the feature columns (not the diabetic label)
-sample = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].sample(n=100).values
+# Load the diabetes features (not the diabetic label) from the columnar cache of diabetes.csv
+features = diabetes_store.features
+X, _ = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv')
+# Get a sample of the cases
+sample = X[np.random.choice(len(X), sample_size, replace=sample_size > len(X))]
 
 # Create a folder
-batch_folder = './batch-data'
+dataset_name = 'batch-data' if batch_format == 'csv' else 'batch-data-packed'
+batch_folder = './' + dataset_name
 os.makedirs(batch_folder, exist_ok=True)
 print("Folder created!")
 
-# Save each sample as a separate file
-print("Saving files...")
-for i in range(100):
-    fname = str(i+1) + '.csv'
-    sample[i].tofile(os.path.join(batch_folder, fname), sep=",")
-print("files saved!")
+if batch_format == 'csv':
+    # Save each sample as a separate file
+    print("Saving files...")
+    for i in range(sample_size):
+        fname = str(i+1) + '.csv'
+        sample[i].tofile(os.path.join(batch_folder, fname), sep=",")
+    print("files saved!")
+else:
+    # Save the samples in shards of many rows, each row keeping its id
+    print("Saving shards...")
+    for shard, start in enumerate(range(0, sample_size, rows_per_shard)):
+        rows = sample[start:start + rows_per_shard].astype(np.float32)
+        row_ids = np.arange(start + 1, start + 1 + len(rows), dtype=np.int64)
+        if batch_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_arrays([pa.array(row_ids)] + [pa.array(rows[:, j]) for j in range(len(features))],
+                                         names=['row_id'] + features)
+            # Row groups let the scoring script stream a shard instead of loading it whole
+            pq.write_table(table, os.path.join(batch_folder, 'part-{:05d}.parquet'.format(shard)),
+                           row_group_size=row_group_size)
+        else:
+            records = np.empty(len(rows), dtype=[('row_id', '<i8'), ('features', '<f4', (len(features),))])
+            records['row_id'] = row_ids
+            records['features'] = rows
+            np.save(os.path.join(batch_folder, 'part-{:05d}.npy'.format(shard)), records)
+    print("shards saved!")
 
 # Upload the files to the default datastore
 print("Uploading files to datastore...")
 default_ds = ws.get_default_datastore()
-default_ds.upload(src_dir="batch-data", target_path="batch-data", overwrite=True, show_progress=True)
+# (in parallel, and only the files whose content changed since the last upload to the folder)
+batch_files = sorted(os.path.join(dirpath, name) for dirpath, _, names in os.walk(batch_folder) for name in names)
+report = upload(BlobDatastore(default_ds), files=batch_files, target_path=dataset_name, src_dir=batch_folder)
+print(report.summary())
 
 # Register a dataset for the input data
-batch_data_set = Dataset.File.from_files(path=(default_ds, 'batch-data/'), validate=False)
+batch_data_set = Dataset.File.from_files(path=(default_ds, dataset_name + '/'), validate=False)
 try:
     batch_data_set = batch_data_set.register(workspace=ws, 
-                                             name='batch-data',
+                                             name=dataset_name,
                                              description='batch data',
                                              create_new_version=True)
 except Exception as ex:
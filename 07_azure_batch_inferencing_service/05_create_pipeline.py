@@ -6,6 +6,7 @@ from azureml.core import Experiment
 from azureml.pipeline.core import Pipeline
 import pandas as pd
 import shutil
+import glob
 import os
 
 # Load the workspace from the saved config file
@@ -16,17 +17,36 @@ batch_env = Environment.from_conda_specification("experiment_env", ".azureml/bat
 # batch_env.docker.base_image = DEFAULT_CPU_IMAGE
 print('Configuration ready.')
 
-# Get the dataset
-batch_data_set = ws.datasets.get("batch-data")
+# Choose the input to score:
+#  'files'   - one CSV file per patient (batch-data)
+#  'packed'  - shards from 03_generate_and_upload_batch_data.py with batch_format 'parquet' or 'npy' (batch-data-packed)
+#  'tabular' - DataFrame chunks of the registered tabular dataset, split by size
+input_mode = 'files'
+
+# Get the dataset, the entry script and the mini-batch size for the chosen input
+if input_mode == 'tabular':
+    batch_data_set = ws.datasets.get("diabetes dataset")
+    entry_script, mini_batch_size = "batch_diabetes_tabular.py", "64MB"
+elif input_mode == 'packed':
+    batch_data_set = ws.datasets.get("batch-data-packed")
+    entry_script, mini_batch_size = "batch_diabetes.py", "1" # one shard (many patients) per mini-batch
+else:
+    batch_data_set = ws.datasets.get("batch-data")
+    entry_script, mini_batch_size = "batch_diabetes.py", "5"
+
+# Choose how the results are written:
+#  'parquet' - each worker streams typed Parquet parts (source, row_id, prediction, probability) to the output folder
+#  'text'    - the entry script returns one line per case and ParallelRunStep appends them to parallel_run_step.txt
+results_format = 'parquet'
 
 output_dir = OutputFileDatasetConfig(name='inferences')
 
 parallel_run_config = ParallelRunConfig(
     source_directory='./batch_pipeline',
-    entry_script="batch_diabetes.py",
-    mini_batch_size="5",
+    entry_script=entry_script,
+    mini_batch_size=mini_batch_size,
     error_threshold=10,
-    output_action="append_row",
+    output_action="summary_only" if results_format == 'parquet' else "append_row",
     environment=batch_env,
     compute_target='cpu-cluster',
     node_count=2)
@@ -36,7 +56,7 @@ parallelrun_step = ParallelRunStep(
     parallel_run_config=parallel_run_config,
     inputs=[batch_data_set.as_named_input('diabetes_batch')],
     output=output_dir,
-    arguments=[],
+    arguments=['--results-format', results_format],
     allow_reuse=True
 )
 
@@ -51,15 +71,33 @@ prediction_run = next(pipeline_run.get_children())
 prediction_output = prediction_run.get_output_data('inferences')
 prediction_output.download(local_path='diabetes-results')
 
-# Traverse the folder hierarchy and find the results file
-for root, dirs, files in os.walk('diabetes-results'):
-    for file in files:
-        if file.endswith('parallel_run_step.txt'):
-            result_file = os.path.join(root,file)
+if results_format == 'parquet':
+    import pyarrow.dataset as ds
+
+    # Open all the result parts as one dataset (nothing is read until it is needed)
+    results = ds.dataset(glob.glob('diabetes-results/**/*.parquet', recursive=True), format='parquet')
+    print(results.schema)
+
+    # Count the predictions by reading only the prediction column
+    predictions = results.to_table(columns=['prediction']).column('prediction').to_numpy()
+    print('Scored {:,} cases: {:,} diabetic'.format(len(predictions), int(predictions.sum())))
+
+    # Display the first 20 results
+    print(results.head(20).to_pandas())
+else:
+    # Traverse the folder hierarchy and find the results file
+    for root, dirs, files in os.walk('diabetes-results'):
+        for file in files:
+            if file.endswith('parallel_run_step.txt'):
+                result_file = os.path.join(root,file)
 
-# cleanup output format
-df = pd.read_csv(result_file, delimiter=":", header=None)
-df.columns = ["File", "Prediction"]
+    # cleanup output format (DataFrame results are appended as space-separated rows)
+    if input_mode == 'tabular':
+        df = pd.read_csv(result_file, sep=r'\s+', header=None)
+        df.columns = ["PatientID", "Prediction"]
+    else:
+        df = pd.read_csv(result_file, delimiter=":", header=None)
+        df.columns = ["File", "Prediction"]
 
-# Display the first 20 results
-print(df.head(20))
\ No newline at end of file
+    # Display the first 20 results
+    print(df.head(20))
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Train a local copy of the diabetes model (no workspace needed)
+print("Training local model...")
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+model_dir = tempfile.mkdtemp()
+joblib.dump(value=DecisionTreeClassifier().fit(X, y), filename=os.path.join(model_dir, 'diabetes_model.pkl'))
+
+# Load the entry script the same way ParallelRunStep does
+os.environ['AZUREML_MODEL_DIR'] = model_dir
+sys.path.insert(0, './batch_pipeline')
+import batch_diabetes
+batch_diabetes.init()
+
+# The original per-file implementation, kept here as the baseline
+def run_per_file(mini_batch):
+    resultList = []
+    for f in mini_batch:
+        data = np.genfromtxt(f, delimiter=',')
+        prediction = batch_diabetes.model.predict(data.reshape(1, -1))
+        resultList.append("{}: {}".format(os.path.basename(f), prediction[0]))
+    return resultList
+
+# Write synthetic one-patient files the same way 03_generate_and_upload_batch_data.py does
+data_dir = tempfile.mkdtemp()
+sample = X[np.random.randint(0, len(X), 10000)]
+files = []
+for i in range(len(sample)):
+    fname = os.path.join(data_dir, str(i+1) + '.csv')
+    sample[i].tofile(fname, sep=",")
+    files.append(fname)
+
+# Compare files/sec for different mini-batch sizes
+print('{:>10} {:>18} {:>18}'.format('files', 'per-file run', 'batched run'))
+for mini_batch_size in [5, 100, 10000]:
+    mini_batches = [files[i:i + mini_batch_size] for i in range(0, min(len(files), max(mini_batch_size, 2000)), mini_batch_size)]
+    rates = []
+    for run in (run_per_file, batch_diabetes.run):
+        start = time.perf_counter()
+        results = [run(mini_batch) for mini_batch in mini_batches]
+        rates.append(sum(len(r) for r in results) / (time.perf_counter() - start))
+    assert [run_per_file(b) for b in mini_batches[:3]] == [batch_diabetes.run(b) for b in mini_batches[:3]]
+    print('{:>10} {:>18,.0f} {:>18,.0f}'.format(mini_batch_size, *rates))
+print('(files/sec)')
+
+# Pack the same patients into one shard per format and score each shard as a one-file mini-batch
+import pyarrow as pa
+import pyarrow.parquet as pq
+features = ['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']
+rows = sample.astype(np.float32)
+row_ids = np.arange(1, len(rows) + 1, dtype=np.int64)
+parquet_shard = os.path.join(data_dir, 'part-00000.parquet')
+pq.write_table(pa.Table.from_arrays([pa.array(row_ids)] + [pa.array(rows[:, j]) for j in range(len(features))],
+                                    names=['row_id'] + features), parquet_shard, row_group_size=4096)
+npy_shard = os.path.join(data_dir, 'part-00000.npy')
+records = np.empty(len(rows), dtype=[('row_id', '<i8'), ('features', '<f4', (len(features),))])
+records['row_id'] = row_ids
+records['features'] = rows
+np.save(npy_shard, records)
+
+print('{:>10} {:>18}'.format('shard', 'rows/sec'))
+expected = [r.split(': ')[1] for r in batch_diabetes.run(files)]
+for shard in (parquet_shard, npy_shard):
+    start = time.perf_counter()
+    results = batch_diabetes.run([shard])
+    rate = len(results) / (time.perf_counter() - start)
+    assert [r.split(': ')[1] for r in results] == expected
+    print('{:>10} {:>18,.0f}'.format(os.path.splitext(shard)[1], rate))
@@ -0,0 +1,87 @@
+import io
+import os
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Settings for the simulation
+copies = 20                                        # repeat diabetes.csv to get a bigger table (10k rows per copy)
+mini_batch_sizes = ['64KB', '1MB', '8MB', '64MB']  # byte-sized mini-batches, as in ParallelRunConfig
+file_mini_batch_size = 5                           # files per mini-batch for the one-file-per-patient comparison
+
+# Train a local copy of the diabetes model (no workspace needed)
+print("Training local model...")
+X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+model_dir = tempfile.mkdtemp()
+joblib.dump(value=DecisionTreeClassifier().fit(X, y), filename=os.path.join(model_dir, 'diabetes_model.pkl'))
+
+# Load the entry scripts the same way ParallelRunStep does
+os.environ['AZUREML_MODEL_DIR'] = model_dir
+sys.path.insert(0, './batch_pipeline')
+import batch_diabetes
+import batch_diabetes_tabular
+batch_diabetes_tabular.init()
+
+# Build the table as CSV bytes (the raw file, since the tabular mini-batches are cut from its bytes)
+with open('../03_azure_work_with_data/data/diabetes.csv', 'rb') as f:
+    header, body = f.read().split(b'\n', 1)
+body = body.rstrip(b'\n') + b'\n'
+table = body * copies
+rows = table.count(b'\n')
+print('Table: {:,} rows, {:.1f} MB'.format(rows, len(table) / 2**20))
+
+
+# Split the table into chunks of about mini_batch_bytes, cut at row boundaries
+def byte_chunks(data, mini_batch_bytes):
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', min(start + mini_batch_bytes, len(data)) - 1)
+        end = len(data) if end == -1 else end + 1
+        yield data[start:end]
+        start = end
+
+
+def parse_size(size):
+    units = {'KB': 2**10, 'MB': 2**20, 'GB': 2**30}
+    return int(size[:-2]) * units[size[-2:].upper()]
+
+
+# Run each byte-sized mini-batch through the tabular entry script
+print('{:>12} {:>12} {:>16} {:>16}'.format('mini-batch', 'batches', 'rows/sec', 'score rows/sec'))
+for size in mini_batch_sizes:
+    batches = 0
+    scored = 0
+    score_time = 0.0
+    start = time.perf_counter()
+    for chunk in byte_chunks(table, parse_size(size)):
+        mini_batch = pd.read_csv(io.BytesIO(header + b'\n' + chunk))
+        score_start = time.perf_counter()
+        results = batch_diabetes_tabular.run(mini_batch)
+        score_time += time.perf_counter() - score_start
+        scored += len(results)
+        batches += 1
+    elapsed = time.perf_counter() - start
+    assert scored == rows
+    print('{:>12} {:>12,} {:>16,.0f} {:>16,.0f}'.format(size, batches, scored / elapsed, scored / score_time))
+
+# Compare with one file per patient, scored in mini-batches of files
+data_dir = tempfile.mkdtemp()
+files = []
+for i, row in enumerate(X[:2000]):
+    fname = os.path.join(data_dir, str(i+1) + '.csv')
+    row.tofile(fname, sep=",")
+    files.append(fname)
+start = time.perf_counter()
+for i in range(0, len(files), file_mini_batch_size):
+    batch_diabetes.run(files[i:i + file_mini_batch_size])
+print('{:>12} {:>12,} {:>16,.0f}'.format('{} files'.format(file_mini_batch_size),
+                                          len(files) // file_mini_batch_size,
+                                          len(files) / (time.perf_counter() - start)))
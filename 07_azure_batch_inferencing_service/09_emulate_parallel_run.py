@@ -0,0 +1,54 @@
+import os
+import tempfile
+import joblib
+import numpy as np
+import sys
+from sklearn.tree import DecisionTreeClassifier
+from parallel_run_emulator import ParallelRunEmulator
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Settings to try (05_create_pipeline.py uses mini_batch_size="5", error_threshold=10 and node_count=2)
+mini_batch_sizes = ["5", "50", "500"]
+node_count = 2
+process_counts_per_node = [1, 2, 4]
+error_threshold = 10
+synthetic_files = 5000
+
+if __name__ == '__main__':
+    # Train a local copy of the diabetes model (no workspace needed)
+    print("Training local model...")
+    X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+    model_dir = tempfile.mkdtemp()
+    joblib.dump(value=DecisionTreeClassifier().fit(X, y), filename=os.path.join(model_dir, 'diabetes_model.pkl'))
+
+    # Use the files from 03_generate_and_upload_batch_data.py, or write synthetic ones like it does
+    batch_folder = './batch-data'
+    if not os.path.isdir(batch_folder):
+        batch_folder = tempfile.mkdtemp()
+        sample = X[np.random.randint(0, len(X), synthetic_files)]
+        for i in range(synthetic_files):
+            sample[i].tofile(os.path.join(batch_folder, str(i+1) + '.csv'), sep=",")
+    files = sorted(os.path.join(batch_folder, f) for f in os.listdir(batch_folder))
+    print('Scoring {:,} files from {}'.format(len(files), batch_folder))
+
+    # Run the entry script with each setting and compare
+    print('{:>10} {:>6} {:>10} {:>9} {:>10} {:>10} {:>12} {:>10} {:>10} {:>12}'.format(
+        'mini-batch', 'nodes', 'processes', 'batches', 'wall s', 'startup s', 'files/s', 'p50 ms', 'p95 ms', 'utilization'))
+    for mini_batch_size in mini_batch_sizes:
+        for process_count_per_node in process_counts_per_node:
+            emulator = ParallelRunEmulator(source_directory='./batch_pipeline',
+                                           entry_script='batch_diabetes.py',
+                                           mini_batch_size=mini_batch_size,
+                                           error_threshold=error_threshold,
+                                           node_count=node_count,
+                                           process_count_per_node=process_count_per_node,
+                                           output_dir=os.path.join(tempfile.gettempdir(), 'diabetes-results-local'),
+                                           environment={'AZUREML_MODEL_DIR': model_dir})
+            summary = emulator.run(files).summary()
+            print('{:>10} {:>6} {:>10} {:>9} {:>10.2f} {:>10.2f} {:>12,.0f} {:>10.2f} {:>10.2f} {:>11.0%}'.format(
+                mini_batch_size, node_count, node_count * process_count_per_node, summary['mini_batches'],
+                summary['wall_clock_s'], summary['startup_s'], summary['items_per_s'], summary['mini_batch_ms_p50'],
+                summary['mini_batch_ms_p95'], summary['worker_utilization_mean']))
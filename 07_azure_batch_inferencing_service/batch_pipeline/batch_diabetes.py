@@ -1,28 +1,114 @@
 import os
+import argparse
 import numpy as np
 from azureml.core import Model
 import joblib
+from feature_scaler import AffineScaler, ScaledModel
+import result_writer
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# Number of feature values in each input file
+n_features = 8
+
+# Rows scored at a time from packed .npy shards (Parquet shards are scored one row group at a time)
+shard_chunk_rows = 65536
 
 
 def init():
     # Runs when the pipeline step is initialized
-    global model
+    global model, results_format, output_dir
+
+    # Get the results format: "file: prediction" text rows, or typed Parquet parts in the step output folder
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--results-format', type=str, dest='results_format', default='text', choices=['text', 'parquet'])
+    args, _ = parser.parse_known_args()
+    results_format = args.results_format
+    output_dir = result_writer.output_dir() if results_format == 'parquet' else None
 
     # load the model
-    model_path = Model.get_model_path('diabetes_model')
-    model = joblib.load(model_path)
+    # (AZUREML_MODEL_DIR can point at a local model folder when the script is run outside the pipeline)
+    model_path = os.getenv('AZUREML_MODEL_DIR') or Model.get_model_path('diabetes_model')
+    # Arrays in the model files are memory-mapped, so the processes on a node share them through the page cache
+    mmap_mode = os.getenv('MODEL_MMAP_MODE', 'r') or None
+    # (the flat tree engine is only faster on small batches, so batch scoring always uses the sklearn model)
+    model = joblib.load(find_model_file(model_path, 'diabetes_model.pkl'), mmap_mode=mmap_mode)
+    # Models trained on scaled features are registered with the scaler, which then runs before every predict
+    scaler_path = find_model_file(model_path, 'diabetes_scaler.npy')
+    if scaler_path:
+        model = ScaledModel(model, AffineScaler.load(scaler_path))
+
+
+# Find a model file (models registered from a folder give a folder path)
+def find_model_file(model_path, file_name):
+    if os.path.isfile(model_path):
+        return model_path if os.path.basename(model_path) == file_name else None
+    for root, dirs, files in os.walk(model_path):
+        if file_name in files:
+            return os.path.join(root, file_name)
+    return None
 
 
 def run(mini_batch):
     # This runs for each batch
     resultList = []
 
-    # process each file in the batch
+    # One-patient CSV files are scored together, packed shards are streamed
+    csv_files = [f for f in mini_batch if not is_shard(f)]
+    if csv_files:
+        resultList.extend(score(read_csv_files(csv_files), [os.path.basename(f) for f in csv_files]))
     for f in mini_batch:
-        # Read the comma-delimited data into an array
-        data = np.genfromtxt(f, delimiter=',')
-        # Reshape into a 2-dimensional array for prediction (model expects multiple items)
-        prediction = model.predict(data.reshape(1, -1))
-        # Append prediction to results
-        resultList.append("{}: {}".format(os.path.basename(f), prediction[0]))
-    return resultList
\ No newline at end of file
+        if is_shard(f):
+            for row_ids, data in read_shard(f):
+                resultList.extend(score(data, os.path.basename(f), row_ids))
+
+    # Parquet results are already written, so just report every file of the batch as done
+    return mini_batch if results_format == 'parquet' else resultList
+
+
+def is_shard(f):
+    return f.endswith('.parquet') or f.endswith('.npy')
+
+
+def read_csv_files(files):
+    # Read every file into one preallocated float32 array (one row of comma-delimited values per file)
+    data = np.empty((len(files), n_features), dtype=np.float32)
+    for i, f in enumerate(files):
+        with open(f) as file:
+            data[i] = file.read().split(',')
+    return data
+
+
+# Score a chunk of cases with a single call and write or return its results
+def score(data, sources, row_ids=None):
+    if results_format == 'parquet':
+        # Write a typed Parquet part with the class and the probability of being diabetic
+        probabilities = model.predict_proba(data)
+        predictions = model.classes_[probabilities.argmax(axis=1)]
+        result_writer.write_part(output_dir, sources, row_ids, predictions, probabilities[:, 1])
+        return []
+    predictions = model.predict(data)
+    # Return one "file: prediction" result per file, or "row_id: prediction" per row of a shard
+    ids = sources if row_ids is None else row_ids
+    return ["{}: {}".format(i, prediction) for i, prediction in zip(ids, predictions)]
+
+
+# Yield (row ids, features) chunks from a packed shard without loading it whole
+def read_shard(f):
+    if f.endswith('.parquet'):
+        if pq is None:
+            raise ValueError('Parquet shards need pyarrow installed in the batch environment')
+        shard = pq.ParquetFile(f)
+        for i in range(shard.num_row_groups):
+            table = shard.read_row_group(i)
+            features = [table.column(name).to_numpy() for name in table.column_names if name != 'row_id']
+            yield table.column('row_id').to_numpy(), np.column_stack(features).astype(np.float32, copy=False)
+    else:
+        # Memory-map the structured records, so only the current chunk is paged in
+        records = np.load(f, mmap_mode='r')
+        for start in range(0, len(records), shard_chunk_rows):
+            chunk = records[start:start + shard_chunk_rows]
+            yield chunk['row_id'], np.ascontiguousarray(chunk['features'], dtype=np.float32)
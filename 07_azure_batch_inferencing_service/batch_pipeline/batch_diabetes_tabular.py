@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import batch_diabetes
+
+# Feature columns read from each DataFrame mini-batch
+features = ['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']
+
+
+def init():
+    # Runs when the pipeline step is initialized (loads the same model as the file entry script)
+    batch_diabetes.init()
+
+
+def run(mini_batch):
+    # This runs for each batch, with a pandas DataFrame holding a chunk of the tabular dataset
+    data = mini_batch[features].to_numpy(dtype=np.float32)
+    # Use PatientID as the id of each row (the DataFrame index when there is no PatientID column)
+    ids = mini_batch['PatientID'].values if 'PatientID' in mini_batch.columns else mini_batch.index.values
+
+    # Parquet results are written as a typed part; return the ids so every row is reported as done
+    if batch_diabetes.results_format == 'parquet':
+        batch_diabetes.score(data, 'PatientID', ids)
+        return pd.DataFrame({'PatientID': ids})
+
+    # Get the predictions for the whole chunk in a single call
+    predictions = batch_diabetes.model.predict(data)
+
+    # Return one id/prediction row per patient
+    return pd.DataFrame({'PatientID': ids, 'Prediction': predictions})
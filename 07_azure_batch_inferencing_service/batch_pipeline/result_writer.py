@@ -0,0 +1,45 @@
+import os
+import uuid
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Columns of every results part: where the case came from, its id there, the predicted class and P(diabetic)
+if pa is not None:
+    schema = pa.schema([('source', pa.string()),
+                        ('row_id', pa.int64()),
+                        ('prediction', pa.int8()),
+                        ('probability', pa.float32())])
+
+
+# Get the folder the step output is written to
+def output_dir():
+    try:
+        # Only available inside ParallelRunStep
+        from azureml_user.parallel_run import EntryScript
+        return EntryScript().output_dir
+    except ImportError:
+        return os.environ.get('PARALLEL_RUN_OUTPUT_DIR', 'outputs')
+
+
+# Write the results of one chunk of cases as a new Parquet part (row_ids may be None)
+def write_part(folder, sources, row_ids, predictions, probabilities):
+    if pq is None:
+        raise ValueError('Parquet results need pyarrow installed in the batch environment')
+    if isinstance(sources, str):
+        sources = [sources] * len(predictions)
+    if row_ids is None:
+        row_ids = [None] * len(predictions)
+    table = pa.Table.from_arrays([pa.array(sources, pa.string()),
+                                  pa.array(row_ids, pa.int64()),
+                                  pa.array(np.asarray(predictions, dtype=np.int8)),
+                                  pa.array(np.asarray(probabilities, dtype=np.float32))],
+                                 schema=schema)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, 'part-{}-{}.parquet'.format(os.getpid(), uuid.uuid4().hex))
+    pq.write_table(table, path)
+    return path
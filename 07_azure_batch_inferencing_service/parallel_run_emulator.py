@@ -0,0 +1,161 @@
+import importlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Local stand-in for ParallelRunStep: init() once per worker process, run() per mini-batch,
+# append_row or summary_only output and error_threshold, with timings to tune the settings before using the cluster
+# (entry scripts find the output folder in PARALLEL_RUN_OUTPUT_DIR, where ParallelRunStep gives EntryScript().output_dir)
+
+entry = None
+
+
+def _init_worker(source_directory, entry_script, arguments, environment):
+    # Runs once in each worker process, like the ParallelRunStep agent does on each node
+    global entry
+    os.environ.update(environment)
+    sys.argv = [entry_script] + list(arguments)
+    sys.path.insert(0, os.path.abspath(source_directory))
+    entry = importlib.import_module(os.path.splitext(entry_script)[0])
+    entry.init()
+
+
+def _run_mini_batch(task):
+    index, mini_batch = task
+    # Tabular mini-batches arrive as CSV bytes and are parsed in the worker, like a real agent reads its chunk
+    if isinstance(mini_batch, bytes):
+        mini_batch = pd.read_csv(io.BytesIO(mini_batch))
+    # (perf_counter is a monotonic clock shared by the processes on a machine, so the parent can compare starts)
+    start = time.perf_counter()
+    try:
+        results, error = entry.run(mini_batch), None
+    except Exception as ex:
+        results, error = None, '{}: {}'.format(type(ex).__name__, ex)
+    return index, os.getpid(), start, time.perf_counter() - start, len(mini_batch), results, error
+
+
+# Split a list of files into mini-batches of mini_batch_size files
+def file_mini_batches(files, mini_batch_size):
+    return [files[i:i + mini_batch_size] for i in range(0, len(files), mini_batch_size)]
+
+
+# Split delimited files into mini-batches of about mini_batch_bytes, cut at row boundaries (each keeps the header)
+def tabular_mini_batches(files, mini_batch_bytes):
+    mini_batches = []
+    for f in files:
+        with open(f, 'rb') as file:
+            header, body = file.read().split(b'\n', 1)
+        start = 0
+        while start < len(body):
+            end = body.find(b'\n', min(start + mini_batch_bytes, len(body)) - 1)
+            end = len(body) if end == -1 else end + 1
+            if body[start:end].strip():
+                mini_batches.append(header + b'\n' + body[start:end])
+            start = end
+    return mini_batches
+
+
+def parse_mini_batch_size(mini_batch_size):
+    units = {'KB': 2**10, 'MB': 2**20, 'GB': 2**30}
+    return int(float(mini_batch_size[:-2]) * units[mini_batch_size[-2:].upper()])
+
+
+class ParallelRunEmulator:
+
+    def __init__(self, source_directory, entry_script, mini_batch_size, error_threshold=10,
+                 node_count=1, process_count_per_node=None, output_action='append_row',
+                 output_dir='parallel-run-output', arguments=None, environment=None):
+        self.source_directory = source_directory
+        self.entry_script = entry_script
+        self.mini_batch_size = mini_batch_size
+        self.error_threshold = error_threshold
+        self.node_count = node_count
+        # ParallelRunStep starts one process per core on each node by default
+        self.process_count_per_node = process_count_per_node or multiprocessing.cpu_count()
+        self.output_action = output_action
+        self.output_dir = output_dir
+        self.arguments = arguments or []
+        self.environment = dict(environment or {}, PARALLEL_RUN_OUTPUT_DIR=os.path.abspath(output_dir))
+
+    # Run the entry script over the input files; tabular mode is used when mini_batch_size is a size like "64MB"
+    def run(self, files):
+        if str(self.mini_batch_size)[-2:].upper() in ('KB', 'MB', 'GB'):
+            mini_batches = tabular_mini_batches(files, parse_mini_batch_size(self.mini_batch_size))
+        else:
+            mini_batches = file_mini_batches(files, int(self.mini_batch_size))
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_file = os.path.join(self.output_dir, 'parallel_run_step.txt') if self.output_action == 'append_row' else os.devnull
+        processes = self.node_count * self.process_count_per_node
+        context = multiprocessing.get_context('spawn')
+
+        timings = []
+        failed_items = 0
+        errors = []
+        started = time.perf_counter()
+        pool = context.Pool(processes, initializer=_init_worker,
+                            initargs=(self.source_directory, self.entry_script, self.arguments, self.environment))
+        try:
+            with open(output_file, 'w') as output:
+                tasks = pool.imap_unordered(_run_mini_batch, enumerate(mini_batches))
+                for index, pid, start, elapsed, items, results, error in tasks:
+                    timings.append((index, pid, start, elapsed, items))
+                    # Items with no result count as failures, like ParallelRunStep
+                    if error is not None:
+                        failed_items += items
+                        errors.append('mini-batch {}: {}'.format(index, error))
+                    else:
+                        failed_items += max(0, items - len(results))
+                        if self.output_action == 'append_row':
+                            append_rows(output, results)
+                    if 0 <= self.error_threshold < failed_items:
+                        raise RuntimeError('error_threshold of {} exceeded ({} failed items): {}'.format(
+                            self.error_threshold, failed_items, errors[-1] if errors else 'missing results'))
+        finally:
+            pool.terminate()
+            pool.join()
+        return Report(timings, processes, started, time.perf_counter(), failed_items, errors, output_file)
+
+
+# Write results the way append_row does: one line per list item, DataFrames as space-separated rows
+def append_rows(output, results):
+    if isinstance(results, pd.DataFrame):
+        results.to_csv(output, sep=' ', header=False, index=False)
+    else:
+        for result in results:
+            output.write('{}\n'.format(result))
+
+
+class Report:
+
+    def __init__(self, timings, processes, started, finished, failed_items, errors, output_file):
+        self.timings = timings
+        self.processes = processes
+        self.wall_clock = finished - started
+        # Time spent starting the workers and running init() before the first mini-batch began
+        self.startup = min(t[2] for t in timings) - started if timings else self.wall_clock
+        self.failed_items = failed_items
+        self.errors = errors
+        self.output_file = output_file
+
+    def summary(self):
+        elapsed = np.array([t[3] for t in self.timings])
+        items = sum(t[4] for t in self.timings)
+        # Utilization: time each worker spent inside run() once scoring started
+        scoring = max(self.wall_clock - self.startup, 1e-9)
+        busy = {}
+        for _, pid, _, seconds, _ in self.timings:
+            busy[pid] = busy.get(pid, 0.0) + seconds
+        utilization = [seconds / scoring for seconds in busy.values()] + [0.0] * (self.processes - len(busy))
+        return {'mini_batches': len(self.timings), 'items': items, 'failed_items': self.failed_items,
+                'wall_clock_s': self.wall_clock, 'startup_s': self.startup,
+                'items_per_s': items / self.wall_clock,
+                'mini_batch_ms_p50': np.percentile(elapsed, 50) * 1000 if len(elapsed) else 0.0,
+                'mini_batch_ms_p95': np.percentile(elapsed, 95) * 1000 if len(elapsed) else 0.0,
+                'mini_batch_ms_max': elapsed.max() * 1000 if len(elapsed) else 0.0,
+                'worker_utilization_mean': float(np.mean(utilization)),
+                'worker_utilization_min': float(np.min(utilization))}
@@ -1,6 +1,8 @@
+import math
 from azureml.core import Workspace
 from azureml.core import Experiment, ScriptRunConfig, Environment
 from azureml.train.hyperdrive import GridParameterSampling, HyperDriveConfig, PrimaryMetricGoal, choice
+from azureml.train.hyperdrive import BanditPolicy, MedianStoppingPolicy
 # from azureml.widgets import RunDetails
 
 # Get workspace
@@ -12,30 +14,47 @@ hyper_env = Environment.from_conda_specification("experiment_env", "./.azureml/h
 # Get the training dataset
 diabetes_ds = ws.datasets.get("diabetes dataset")
 
+# Sweep n_estimators with warm starts: each run fits one model per learning rate and grows it through
+# every size, checkpointing outputs/diabetes_model_<n>.pkl, instead of one run per size training from scratch
+warm_start_sweep = True
+n_estimators = [10, 100]
+
 # Create a script config
 script_config = ScriptRunConfig(source_directory='./diabetes_training-hyperdrive',
                                 script='diabetes_training.py',
                                 # Add non-hyperparameter arguments -in this case, the training dataset
-                                arguments = ['--input-data', diabetes_ds.as_named_input('training_data')],
+                                arguments = ['--input-data', diabetes_ds.as_named_input('training_data')] +
+                                            (['--n_estimators_sweep', ','.join(map(str, n_estimators))]
+                                             if warm_start_sweep else []),
                                 environment=hyper_env,
                                 compute_target = 'cpu-cluster')
 
 # Sample a range of parameter values
-params = GridParameterSampling(
-    {
-        # Hyperdrive will try 6 combinations, adding these as script arguments
-        '--learning_rate': choice(0.01, 0.1, 1.0),
-        '--n_estimators' : choice(10, 100)
-    }
-)
+grid = {
+    # Hyperdrive will try every combination (6 runs, or 3 runs of 2 sizes with the warm-start sweep), adding these as script arguments
+    '--learning_rate': [0.01, 0.1, 1.0]
+}
+if not warm_start_sweep:
+    grid['--n_estimators'] = n_estimators
+search_space = {name: choice(*values) for name, values in grid.items()}
+params = GridParameterSampling(search_space)
+grid_runs = math.prod(len(values) for values in grid.values())
+
+# Choose an early termination policy: the script logs the AUC after every 10 estimators, and a run
+# falling behind is cancelled ('bandit': more than 0.01 AUC behind the best run at the same point,
+# 'median': best AUC below the median of the other runs' averages, None: every run trains all its estimators)
+early_termination = 'bandit'
+policies = {'bandit': BanditPolicy(evaluation_interval=1, slack_amount=0.01, delay_evaluation=1),
+            'median': MedianStoppingPolicy(evaluation_interval=1, delay_evaluation=1),
+            None: None}
 
 # Configure hyperdrive settings
 hyperdrive = HyperDriveConfig(run_config=script_config, 
                           hyperparameter_sampling=params, 
-                          policy=None, # No early stopping policy
+                          policy=policies[early_termination], # Cancel runs that are clearly losing
                           primary_metric_name='AUC', # Find the highest AUC metric
                           primary_metric_goal=PrimaryMetricGoal.MAXIMIZE, 
-                          max_total_runs=6, # Restrict the experiment to 6 iterations
+                          max_total_runs=grid_runs, # One iteration per grid point
                           max_concurrent_runs=2) # Run up to 2 iterations in parallel
 
 # Run the experiment
@@ -53,13 +72,17 @@ for child_run in run.get_children_sorted_by_primary_metric():
     print(child_run)
 
 # Get the best run, and its metrics and arguments
+# (a metric logged more than once, like the AUC reported for the early termination policy, comes back as a list:
+# its last value is the final one)
 best_run = run.get_best_run_by_primary_metric()
-best_run_metrics = best_run.get_metrics()
+best_run_metrics = {name: value[-1] if isinstance(value, list) else value
+                    for name, value in best_run.get_metrics().items()}
 script_arguments = best_run.get_details() ['runDefinition']['arguments']
 print('Best Run Id: ', best_run.id)
 print(' -AUC:', best_run_metrics['AUC'])
 print(' -Accuracy:', best_run_metrics['Accuracy'])
 print(' -Arguments:',script_arguments)
+print(' -n_estimators:', best_run_metrics['n_estimators'])
 
 from azureml.core import Model
 
@@ -0,0 +1,40 @@
+import os
+import sys
+import numpy as np
+from sklearn.model_selection import train_test_split
+from local_hyperdrive import LocalHyperDrive, GridParameterSampling, choice
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# Search spaces: the same 6-point grid as 04_run_hyperparameter_experiment.py, and a bigger one
+search_spaces = {
+    'hyperdrive grid': {
+        '--learning_rate': choice(0.01, 0.1, 1.0),
+        '--n_estimators' : choice(10, 100)
+    },
+    'wide grid': {
+        '--learning_rate': choice(*np.round(np.geomspace(0.01, 1.0, 15), 4).tolist()),
+        '--n_estimators' : choice(5, 10, 20, 40, 80, 120, 160)
+    },
+}
+
+if __name__ == '__main__':
+    # Load and split the data once for every trial (the same split diabetes_training.py makes)
+    X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+
+    for name, parameter_space in search_spaces.items():
+        tuner = LocalHyperDrive(source_directory='./diabetes_training-hyperdrive',
+                                script='diabetes_training.py',
+                                hyperparameter_sampling=GridParameterSampling(parameter_space),
+                                primary_metric_name='AUC',
+                                primary_metric_goal='maximize',
+                                max_concurrent_runs=os.cpu_count())
+        # Each search writes its best model to its own folder, e.g. outputs/hyperdrive-grid/diabetes_model.pkl
+        output_dir = os.path.join('outputs', name.replace(' ', '-'))
+        report = tuner.run(X_train, X_test, y_train, y_test, output_dir=output_dir)
+        print('{}: {}'.format(name, report.summary()))
+        report.print(top=5)
+        print('Best model saved to', os.path.join(output_dir, 'diabetes_model.pkl'))
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import numpy as np
+from sklearn.model_selection import train_test_split
+from local_hyperdrive import LocalHyperDrive, GridParameterSampling, BanditPolicy, MedianStoppingPolicy, choice
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# The search space to sweep with each policy (trials report their AUC every 10 estimators). The values most likely
+# to do well are listed first, so the first trials set the bar the policies compare later trials against.
+parameter_space = {
+    '--learning_rate': choice(0.3, 0.1, 1.0, 0.03, 0.01),
+    '--n_estimators' : choice(160, 80, 40)
+}
+policies = {
+    'none': None,
+    'bandit 0.01': BanditPolicy(evaluation_interval=1, slack_amount=0.01, delay_evaluation=1),
+    'bandit 0.005': BanditPolicy(evaluation_interval=1, slack_amount=0.005, delay_evaluation=1),
+    'median': MedianStoppingPolicy(evaluation_interval=1, delay_evaluation=1),
+}
+
+if __name__ == '__main__':
+    X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+    requested = sum(point['--n_estimators'] for point in GridParameterSampling(parameter_space).points())
+
+    # Compare estimators fitted (compute) and wall clock against the best AUC found with no policy
+    print('{:>13} {:>7} {:>11} {:>11} {:>8} {:>9} {:>10}'.format(
+        'policy', 'trials', 'terminated', 'estimators', 'wall s', 'best AUC', 'AUC loss'))
+    baseline = None
+    for name, policy in policies.items():
+        tuner = LocalHyperDrive(source_directory='./diabetes_training-hyperdrive',
+                                script='diabetes_training.py',
+                                hyperparameter_sampling=GridParameterSampling(parameter_space),
+                                policy=policy,
+                                primary_metric_name='AUC',
+                                primary_metric_goal='maximize',
+                                max_concurrent_runs=os.cpu_count())
+        report = tuner.run(X_train, X_test, y_train, y_test, output_dir=tempfile.mkdtemp())
+        summary = report.summary()
+        fitted = sum(trial['metrics']['n_estimators'] for trial in report.trials)
+        baseline = baseline or summary['best_AUC']
+        print('{:>13} {:>7} {:>11} {:>10.0%} {:>8.1f} {:>9.4f} {:>10.4f}'.format(
+            name, summary['trials'], summary['terminated'], fitted / requested, summary['wall_clock_s'],
+            summary['best_AUC'], baseline - summary['best_AUC']))
+    print('(estimators: share of the estimators the sweep asks for)')
@@ -0,0 +1,57 @@
+import math
+import os
+import sys
+import tempfile
+import numpy as np
+from sklearn.model_selection import train_test_split
+from local_hyperdrive import (LocalHyperDrive, GridParameterSampling, RandomParameterSampling, HyperbandParameterSampling,
+                              BayesianParameterSampling, choice, loguniform, quniform)
+
+# The diabetes data is read from a columnar cache of diabetes.csv
+sys.path.insert(0, '../03_azure_work_with_data/src')
+import diabetes_store
+
+# The grid, and a continuous space over the same ranges for the other samplers
+grid_space = {
+    '--learning_rate': choice(0.01, 0.03, 0.1, 0.3, 1.0),
+    '--n_estimators' : choice(40, 80, 160),
+    '--max_depth'    : choice(2, 3, 4)
+}
+space = {
+    '--learning_rate': loguniform(math.log(0.01), math.log(1.0)),
+    '--n_estimators' : quniform(10, 160, 10),
+    '--max_depth'    : choice(2, 3, 4)
+}
+max_runs = 24
+samplers = {
+    'grid': (GridParameterSampling(grid_space), None),
+    'random': (RandomParameterSampling(space, seed=0), max_runs),
+    'hyperband trees': (HyperbandParameterSampling(space, budget_parameter='--n_estimators',
+                                                   min_budget=10, max_budget=160, seed=0), None),
+    'hyperband rows': (HyperbandParameterSampling(dict(space, **{'--n_estimators': choice(40, 80, 160)}),
+                                                  budget_parameter='--data_fraction',
+                                                  min_budget=1 / 9, max_budget=1.0, seed=0), None),
+    'bayesian': (BayesianParameterSampling(space, n_startup=8, seed=0), max_runs),
+}
+
+if __name__ == '__main__':
+    X, y = diabetes_store.load_xy('../03_azure_work_with_data/data/diabetes.csv', label_dtype=np.int8)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+
+    # Budget: estimators fitted times the fraction of the training set they were fitted on
+    print('{:>16} {:>7} {:>8} {:>8} {:>9} {:>15}'.format('sampler', 'trials', 'budget', 'wall s', 'best AUC',
+                                                        'trials to best'))
+    for name, (sampler, max_total_runs) in samplers.items():
+        tuner = LocalHyperDrive(source_directory='./diabetes_training-hyperdrive',
+                                script='diabetes_training.py',
+                                hyperparameter_sampling=sampler,
+                                primary_metric_name='AUC',
+                                primary_metric_goal='maximize',
+                                max_total_runs=max_total_runs,
+                                max_concurrent_runs=os.cpu_count())
+        report = tuner.run(X_train, X_test, y_train, y_test, output_dir=tempfile.mkdtemp())
+        summary = report.summary()
+        budget = sum(trial['metrics']['n_estimators'] * trial['arguments'].get('--data_fraction', 1.0)
+                     for trial in report.trials)
+        print('{:>16} {:>7} {:>8.0f} {:>8.1f} {:>9.4f} {:>15}'.format(
+            name, summary['trials'], budget, summary['wall_clock_s'], summary['best_AUC'], summary['trials_to_best']))
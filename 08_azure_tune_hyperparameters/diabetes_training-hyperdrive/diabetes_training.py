@@ -1,61 +1,142 @@
 # Import libraries
-import argparse, joblib, os
+import argparse, joblib, os, pickle
 from azureml.core import Run
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.metrics import roc_auc_score, roc_curve
+import diabetes_store
 
-# Get the experiment run context
-run = Run.get_context()
 
-# Get script arguments
-parser = argparse.ArgumentParser()
+# Train a Gradient Boosting classification model with the specified hyperparameters, and get its metrics
+# (the local tuner calls this directly for every trial, with the data split once and shared)
+# The trees are added report_interval at a time, and report(metrics) gets the AUC so far after each batch:
+# when it returns True, training stops early with the trees fitted so far.
+# data_fraction trains on the first part of the training set only, so samplers can try configurations cheaply.
+def train_model(X_train, X_test, y_train, y_test, learning_rate=0.1, n_estimators=100, max_depth=3, subsample=1.0,
+                data_fraction=1.0, report=None, report_interval=10):
+    model, metrics = None, None
+    for _, model, metrics in train_sizes(X_train, X_test, y_train, y_test, [n_estimators], learning_rate=learning_rate,
+                                         max_depth=max_depth, subsample=subsample, data_fraction=data_fraction,
+                                         report=report, report_interval=report_interval, copy=False):
+        pass
+    return model, metrics
 
-# Input dataset
-parser.add_argument("--input-data", type=str, dest='input_data', help='training dataset')
 
-# Hyperparameters
-parser.add_argument('--learning_rate', type=float, dest='learning_rate', default=0.1, help='learning rate')
-parser.add_argument('--n_estimators', type=int, dest='n_estimators', default=100, help='number of estimators')
+# Warm-start sweep: fit one model and grow it through every size in n_estimators_sizes, yielding
+# (n_estimators, model, metrics) at each one, instead of training a model from scratch per size.
+# An early stop yields the model as it stopped and skips the larger sizes. Each model is a copy unless copy is False.
+def train_sizes(X_train, X_test, y_train, y_test, n_estimators_sizes, learning_rate=0.1, max_depth=3, subsample=1.0,
+                data_fraction=1.0, report=None, report_interval=10, copy=True):
+    sizes = sorted(set(int(size) for size in n_estimators_sizes))
+    rows = max(1, int(round(len(X_train) * data_fraction)))
+    X_train, y_train = X_train[:rows], y_train[:rows]
+    model = GradientBoostingClassifier(learning_rate=learning_rate, max_depth=int(max_depth), subsample=subsample,
+                                       n_estimators=0, warm_start=True)
+    # Stop at every report and every requested size
+    stops = sorted(set(range(report_interval, sizes[-1], report_interval)) | set(sizes))
+    for n_estimators in stops:
+        model.n_estimators = n_estimators
+        model.fit(X_train, y_train)
+        metrics = evaluate(model, X_test, y_test)
+        stop = report is not None and report(metrics)
+        if n_estimators in sizes or stop:
+            yield n_estimators, copy_model(model) if copy else model, metrics
+        if stop:
+            break
 
-# Add arguments to args collection
-args = parser.parse_args()
 
-# Log Hyperparameter values
-run.log('learning_rate',  np.float(args.learning_rate))
-run.log('n_estimators',  np.int(args.n_estimators))
+def copy_model(model):
+    return pickle.loads(pickle.dumps(model))
 
-# load the diabetes dataset
-print("Loading Data...")
-diabetes = run.input_datasets['training_data'].to_pandas_dataframe() # Get the training data from the estimator input
 
-# Separate features and labels
-X, y = diabetes[['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']].values, diabetes['Diabetic'].values
+def evaluate(model, X_test, y_test):
+    # calculate accuracy
+    y_hat = model.predict(X_test)
+    acc = np.average(y_hat == y_test)
 
-# Split data into training set and test set
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+    # calculate AUC
+    y_scores = model.predict_proba(X_test)
+    auc = roc_auc_score(y_test,y_scores[:,1])
+    return {'Accuracy': float(acc), 'AUC': float(auc), 'n_estimators': int(model.n_estimators)}
 
-# Train a Gradient Boosting classification model with the specified hyperparameters
-print('Training a classification model')
-model = GradientBoostingClassifier(learning_rate=args.learning_rate,
-                                   n_estimators=args.n_estimators).fit(X_train, y_train)
 
-# calculate accuracy
-y_hat = model.predict(X_test)
-acc = np.average(y_hat == y_test)
-print('Accuracy:', acc)
-run.log('Accuracy', np.float(acc))
+if __name__ == '__main__':
+    # Get the experiment run context
+    run = Run.get_context()
 
-# calculate AUC
-y_scores = model.predict_proba(X_test)
-auc = roc_auc_score(y_test,y_scores[:,1])
-print('AUC: ' + str(auc))
-run.log('AUC', np.float(auc))
+    # Get script arguments
+    parser = argparse.ArgumentParser()
 
-# Save the model in the run outputs
-os.makedirs('outputs', exist_ok=True)
-joblib.dump(value=model, filename='outputs/diabetes_model.pkl')
+    # Input dataset
+    parser.add_argument("--input-data", type=str, dest='input_data', help='training dataset')
 
-run.complete()
\ No newline at end of file
+    # Hyperparameters
+    parser.add_argument('--learning_rate', type=float, dest='learning_rate', default=0.1, help='learning rate')
+    parser.add_argument('--n_estimators', type=int, dest='n_estimators', default=100, help='number of estimators')
+    parser.add_argument('--max_depth', type=int, dest='max_depth', default=3, help='maximum depth of each tree')
+    parser.add_argument('--subsample', type=float, dest='subsample', default=1.0, help='fraction of rows for each tree')
+    parser.add_argument('--data_fraction', type=float, dest='data_fraction', default=1.0,
+                        help='fraction of the training set to train on')
+    parser.add_argument('--n_estimators_sweep', type=str, dest='n_estimators_sweep', default=None,
+                        help='comma-separated numbers of estimators to grow one warm-started model through '
+                             '(instead of --n_estimators), with a model checkpointed at each')
+    parser.add_argument('--report_interval', type=int, dest='report_interval', default=10,
+                        help='estimators between AUC reports, for early termination policies')
+
+    # Add arguments to args collection
+    args = parser.parse_args()
+
+    # Log Hyperparameter values
+    run.log('learning_rate',  float(args.learning_rate))
+    if args.n_estimators_sweep is None:
+        run.log('n_estimators',  int(args.n_estimators))
+    run.log('max_depth',  int(args.max_depth))
+    run.log('subsample',  float(args.subsample))
+    run.log('data_fraction',  float(args.data_fraction))
+
+    # load the diabetes dataset
+    print("Loading Data...")
+    # (the dataset is cached on the node by id and version, so later trials memory-map it instead of downloading it)
+    X, y = diabetes_store.load_dataset_xy(run.input_datasets['training_data'], label_dtype=np.int8)
+
+    # Split data into training set and test set
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
+
+    # Train a Gradient Boosting classification model with the specified hyperparameters
+    print('Training a classification model')
+    os.makedirs('outputs', exist_ok=True)
+    # (the AUC is logged after every report_interval estimators, so a HyperDrive policy can cancel a losing run)
+    if args.n_estimators_sweep is None:
+        model, metrics = train_model(X_train, X_test, y_train, y_test,
+                                     learning_rate=args.learning_rate, n_estimators=args.n_estimators,
+                                     max_depth=args.max_depth, subsample=args.subsample, data_fraction=args.data_fraction,
+                                     report=lambda metrics: run.log('AUC', metrics['AUC']),
+                                     report_interval=args.report_interval)
+        # Save the model in the run outputs
+        joblib.dump(value=model, filename='outputs/diabetes_model.pkl')
+    else:
+        # Grow one model through every size, saving outputs/diabetes_model_<n>.pkl at each,
+        # and keep the size with the best AUC so far as the run's model (outputs/diabetes_model.pkl),
+        # so a run cancelled by the early termination policy still has one
+        metrics = None
+        for n_estimators, sized_model, sized_metrics in train_sizes(
+                X_train, X_test, y_train, y_test, args.n_estimators_sweep.split(','),
+                learning_rate=args.learning_rate, max_depth=args.max_depth, subsample=args.subsample,
+                data_fraction=args.data_fraction, report=lambda metrics: run.log('AUC', metrics['AUC']),
+                report_interval=args.report_interval, copy=False):
+            print('n_estimators {}: AUC {}'.format(n_estimators, sized_metrics['AUC']))
+            run.log_row('n_estimators sweep', n_estimators=n_estimators, AUC=sized_metrics['AUC'],
+                        Accuracy=sized_metrics['Accuracy'])
+            joblib.dump(value=sized_model, filename='outputs/diabetes_model_{}.pkl'.format(n_estimators))
+            if metrics is None or sized_metrics['AUC'] > metrics['AUC']:
+                joblib.dump(value=sized_model, filename='outputs/diabetes_model.pkl')
+                metrics = sized_metrics
+        run.log('n_estimators', metrics['n_estimators'])
+        run.log('AUC', metrics['AUC'])
+    print('Accuracy:', metrics['Accuracy'])
+    run.log('Accuracy', metrics['Accuracy'])
+    print('AUC: ' + str(metrics['AUC']))
+
+    run.complete()
@@ -0,0 +1,201 @@
+import importlib
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+from parameter_sampling import (choice, uniform, loguniform, quniform, randint, GridParameterSampling,
+                                RandomParameterSampling, HyperbandParameterSampling, BayesianParameterSampling)
+
+# Local stand-in for HyperDrive: the same search space expressions, primary metric and max_concurrent_runs,
+# with every trial calling the training script's train_model() in a worker process. The train/test split
+# is saved once and memory-mapped by every worker, instead of each trial reloading and re-splitting the data.
+# train_model() reports the primary metric as it trains, and an early termination policy can stop a losing trial.
+# The sampler is asked for the next trial as workers free up, so adaptive samplers learn from finished trials.
+
+entry = None
+data = None
+trial_settings = None
+
+
+# Stops a trial whose metric is more than a slack behind the best trial at the same report, like BanditPolicy
+class BanditPolicy:
+
+    def __init__(self, evaluation_interval=1, slack_factor=None, slack_amount=None, delay_evaluation=0):
+        if (slack_factor is None) == (slack_amount is None):
+            raise ValueError('Set one of slack_factor or slack_amount')
+        self.evaluation_interval = evaluation_interval
+        self.slack_factor = slack_factor
+        self.slack_amount = slack_amount
+        self.delay_evaluation = delay_evaluation
+
+    def should_stop(self, values, others, maximize):
+        n = len(values)
+        if n <= self.delay_evaluation or n % self.evaluation_interval:
+            return False
+        peers = [other[n - 1] for other in others if len(other) >= n] + [values[-1]]
+        if maximize:
+            best = max(peers)
+            limit = best - self.slack_amount if self.slack_amount is not None else best / (1 + self.slack_factor)
+            return values[-1] < limit
+        best = min(peers)
+        limit = best + self.slack_amount if self.slack_amount is not None else best * (1 + self.slack_factor)
+        return values[-1] > limit
+
+
+# Stops a trial whose best metric is worse than the median of the other trials' running averages, like MedianStoppingPolicy
+class MedianStoppingPolicy:
+
+    def __init__(self, evaluation_interval=1, delay_evaluation=0):
+        self.evaluation_interval = evaluation_interval
+        self.delay_evaluation = delay_evaluation
+
+    def should_stop(self, values, others, maximize):
+        n = len(values)
+        if n <= self.delay_evaluation or n % self.evaluation_interval:
+            return False
+        averages = [np.mean(other[:n]) for other in others if len(other) >= n]
+        if not averages:
+            return False
+        median = np.median(averages)
+        return max(values) < median if maximize else min(values) > median
+
+
+def _init_worker(source_directory, script, data_dir, settings):
+    # Runs once in each worker process: import the training script and map the shared split
+    global entry, data, trial_settings
+    trial_settings = settings
+    sys.path.insert(0, os.path.abspath(source_directory))
+    entry = importlib.import_module(os.path.splitext(script)[0])
+    data = [np.load(os.path.join(data_dir, name + '.npy'), mmap_mode='r')
+            for name in ('X_train', 'X_test', 'y_train', 'y_test')]
+
+
+def _run_trial(task):
+    index, arguments, trial_dir = task
+    # Script arguments like '--learning_rate' become train_model() keyword arguments
+    kwargs = {name.lstrip('-'): value for name, value in arguments.items()}
+    policy, history, lock, primary_metric_name, maximize = trial_settings
+    values = []
+    stopped = []
+
+    # Share each reported value with the other trials, and ask the policy whether to stop
+    def report(metrics):
+        values.append(metrics[primary_metric_name])
+        with lock:
+            history[index] = list(values)
+            others = [other for trial, other in history.items() if trial != index]
+        if policy is not None and policy.should_stop(values, others, maximize):
+            stopped.append(len(values))
+            return True
+        return False
+
+    start = time.time()
+    model, metrics = entry.train_model(*data, report=report, **kwargs)
+    model_file = os.path.join(trial_dir, 'trial_{}.pkl'.format(index))
+    joblib.dump(value=model, filename=model_file)
+    return {'trial': index, 'arguments': arguments, 'metrics': metrics, 'seconds': time.time() - start,
+            'reports': len(values), 'status': 'terminated' if stopped else 'completed', 'model_file': model_file}
+
+
+class LocalHyperDrive:
+
+    def __init__(self, source_directory, script, hyperparameter_sampling, policy=None, primary_metric_name='AUC',
+                 primary_metric_goal='maximize', max_total_runs=None, max_concurrent_runs=None):
+        self.source_directory = source_directory
+        self.script = script
+        self.hyperparameter_sampling = hyperparameter_sampling
+        self.policy = policy
+        self.primary_metric_name = primary_metric_name
+        self.primary_metric_goal = primary_metric_goal.lower()
+        self.max_total_runs = max_total_runs
+        self.max_concurrent_runs = max_concurrent_runs or multiprocessing.cpu_count()
+
+    # Run the trials on the split data and write the best model to diabetes_model.pkl in output_dir
+    def run(self, X_train, X_test, y_train, y_test, output_dir='outputs'):
+        sampler = self.hyperparameter_sampling
+        if self.max_total_runs is None and getattr(sampler, 'endless', False):
+            raise ValueError('Set max_total_runs for {}'.format(type(sampler).__name__))
+        work_dir = tempfile.mkdtemp()
+        started = time.time()
+        trials = []
+        try:
+            for name, array in zip(('X_train', 'X_test', 'y_train', 'y_test'), (X_train, X_test, y_train, y_test)):
+                np.save(os.path.join(work_dir, name + '.npy'), np.ascontiguousarray(array))
+            context = multiprocessing.get_context('spawn')
+            manager = context.Manager()
+            settings = (self.policy, manager.dict(), manager.Lock(), self.primary_metric_name,
+                        self.primary_metric_goal == 'maximize')
+            finished = queue.Queue()
+            with manager, context.Pool(self.max_concurrent_runs, initializer=_init_worker,
+                                       initargs=(self.source_directory, self.script, work_dir, settings)) as pool:
+                submitted = running = 0
+                while True:
+                    # Keep max_concurrent_runs trials going while the sampler has work to hand out
+                    while running < self.max_concurrent_runs and submitted != self.max_total_runs:
+                        arguments = sampler.ask()
+                        if arguments is None:
+                            break
+                        pool.apply_async(_run_trial, ((submitted, arguments, work_dir),),
+                                         callback=finished.put, error_callback=finished.put)
+                        submitted += 1
+                        running += 1
+                    if running == 0:
+                        break
+                    trial = finished.get()
+                    running -= 1
+                    if isinstance(trial, BaseException):
+                        raise trial
+                    trial['order'] = len(trials)
+                    trials.append(trial)
+                    sampler.tell(trial['arguments'], trial['metrics'][self.primary_metric_name])
+            total_runs = submitted
+            trials = self.sorted_by_primary_metric(trials)
+            os.makedirs(output_dir, exist_ok=True)
+            if trials:
+                shutil.copy(trials[0]['model_file'], os.path.join(output_dir, 'diabetes_model.pkl'))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        for trial in trials:
+            del trial['model_file']
+        return Report(trials, self.primary_metric_name, total_runs, time.time() - started)
+
+    # Best trial first, like get_children_sorted_by_primary_metric()
+    def sorted_by_primary_metric(self, trials):
+        return sorted(trials, key=lambda trial: trial['metrics'][self.primary_metric_name],
+                      reverse=self.primary_metric_goal == 'maximize')
+
+
+class Report:
+
+    def __init__(self, trials, primary_metric_name, total_runs, wall_clock):
+        self.trials = trials
+        self.primary_metric_name = primary_metric_name
+        self.total_runs = total_runs
+        self.wall_clock = wall_clock
+
+    def best_trial(self):
+        return self.trials[0] if self.trials else None
+
+    def summary(self):
+        trial_seconds = sum(trial['seconds'] for trial in self.trials)
+        return {'trials': len(self.trials), 'terminated': sum(trial['status'] == 'terminated' for trial in self.trials),
+                'wall_clock_s': self.wall_clock,
+                'trials_per_min': len(self.trials) / self.wall_clock * 60,
+                'trial_s_mean': trial_seconds / max(len(self.trials), 1),
+                'best_' + self.primary_metric_name: self.trials[0]['metrics'][self.primary_metric_name] if self.trials else None,
+                'trials_to_best': self.trials_to_best()}
+
+    # How many trials had finished when the best one did (its place in completion order, counting from 1)
+    def trials_to_best(self):
+        return self.trials[0]['order'] + 1 if self.trials else None
+
+    def print(self, top=10):
+        for trial in self.trials[:top]:
+            print('trial {:>4}  {} {:.4f}  {:<10}  {}'.format(trial['trial'], self.primary_metric_name,
+                                                             trial['metrics'][self.primary_metric_name],
+                                                             trial['status'], trial['arguments']))
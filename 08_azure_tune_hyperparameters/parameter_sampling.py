@@ -0,0 +1,199 @@
+import itertools
+import math
+import numpy as np
+
+# Search space expressions in the same form as azureml.train.hyperdrive's, and samplers for the local tuner.
+# A sampler hands out trial arguments with ask() (None while it waits for results) and learns results from tell().
+
+
+def choice(*options):
+    return ['choice', [list(options)]]
+
+
+def uniform(min_value, max_value):
+    return ['uniform', [min_value, max_value]]
+
+
+# exp(uniform(min_value, max_value)), like HyperDrive's loguniform
+def loguniform(min_value, max_value):
+    return ['loguniform', [min_value, max_value]]
+
+
+def quniform(min_value, max_value, q):
+    return ['quniform', [min_value, max_value, q]]
+
+
+def randint(upper):
+    return ['randint', [upper]]
+
+
+# Draw one value of a search space expression
+def sample_value(expression, rng):
+    kind, args = expression
+    if kind == 'choice':
+        return args[0][rng.integers(len(args[0]))]
+    if kind == 'uniform':
+        return float(rng.uniform(*args))
+    if kind == 'loguniform':
+        return float(np.exp(rng.uniform(*args)))
+    if kind == 'quniform':
+        return quantize(rng.uniform(args[0], args[1]), args[2])
+    if kind == 'randint':
+        return int(rng.integers(args[0]))
+    raise ValueError('Unknown parameter expression {}'.format(kind))
+
+
+def quantize(value, q):
+    value = round(value / q) * q
+    return int(value) if float(q).is_integer() else float(value)
+
+
+# Every combination of the choice() values
+class GridParameterSampling:
+
+    def __init__(self, parameter_space):
+        self.parameter_space = parameter_space
+        self.pending = None
+
+    def points(self):
+        names = list(self.parameter_space)
+        for expression in self.parameter_space.values():
+            if expression[0] != 'choice':
+                raise ValueError('Grid sampling only supports choice(), not {}'.format(expression[0]))
+        values = [self.parameter_space[name][1][0] for name in names]
+        return [dict(zip(names, point)) for point in itertools.product(*values)]
+
+    def ask(self):
+        if self.pending is None:
+            self.pending = iter(self.points())
+        return next(self.pending, None)
+
+    def tell(self, arguments, metric):
+        pass
+
+
+# Independent random draws from the space (max_total_runs sets how many)
+class RandomParameterSampling:
+    endless = True
+
+    def __init__(self, parameter_space, seed=None):
+        self.parameter_space = parameter_space
+        self.rng = np.random.default_rng(seed)
+
+    def ask(self):
+        return {name: sample_value(expression, self.rng) for name, expression in self.parameter_space.items()}
+
+    def tell(self, arguments, metric):
+        pass
+
+
+# Hyperband: brackets of successive halving over random configurations. Each rung trains its configurations
+# with a budget (a number of estimators or a data fraction), and only the best 1/eta go on to eta times the budget.
+class HyperbandParameterSampling:
+
+    def __init__(self, parameter_space, budget_parameter='--n_estimators', min_budget=10, max_budget=160, eta=3,
+                 brackets=None, maximize=True, seed=None):
+        self.parameter_space = parameter_space
+        self.budget_parameter = budget_parameter
+        self.eta = eta
+        self.maximize = maximize
+        self.rng = np.random.default_rng(seed)
+        # Bracket s starts n configurations at max_budget / eta**s (brackets=1 is plain successive halving)
+        s_max = int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9))
+        self.brackets = []
+        for s in range(s_max, s_max - (brackets or s_max + 1), -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            self.brackets.append([(int(n * eta ** -i), max_budget * eta ** (i - s)) for i in range(s + 1)])
+        self.rung = None
+        self.queue = []
+        self.running = 0
+        self.results = []
+
+    def _budget(self, budget):
+        return int(round(budget)) if self.budget_parameter == '--n_estimators' else float(budget)
+
+    def _start_rung(self, configs):
+        n, budget = self.rung
+        self.queue = [dict(config, **{self.budget_parameter: self._budget(budget)}) for config in configs[:n]]
+        self.results = []
+
+    def ask(self):
+        if not self.queue and self.running == 0:
+            if self.rung is not None and self.rungs:
+                # Promote the best configurations of the finished rung
+                ranked = sorted(self.results, key=lambda result: result[1], reverse=self.maximize)
+                self.rung = self.rungs.pop(0)
+                self._start_rung([config for config, _ in ranked])
+            elif self.brackets:
+                self.rungs = self.brackets.pop(0)
+                self.rung = self.rungs.pop(0)
+                configs = [{name: sample_value(expression, self.rng) for name, expression in self.parameter_space.items()
+                            if name != self.budget_parameter} for _ in range(self.rung[0])]
+                self._start_rung(configs)
+        if not self.queue:
+            return None
+        self.running += 1
+        return self.queue.pop(0)
+
+    def tell(self, arguments, metric):
+        self.running -= 1
+        self.results.append(({name: value for name, value in arguments.items() if name != self.budget_parameter}, metric))
+
+
+# Tree-structured Parzen estimator: after n_startup random trials, the best gamma of the results and the rest
+# each get a kernel density per parameter, and the candidate with the highest good/bad density ratio is tried next
+class BayesianParameterSampling:
+    endless = True
+
+    def __init__(self, parameter_space, n_startup=10, gamma=0.25, n_candidates=24, maximize=True, seed=None):
+        self.parameter_space = parameter_space
+        self.n_startup = n_startup
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+        self.maximize = maximize
+        self.rng = np.random.default_rng(seed)
+        self.results = []
+
+    def ask(self):
+        if len(self.results) < self.n_startup:
+            return {name: sample_value(expression, self.rng) for name, expression in self.parameter_space.items()}
+        ranked = sorted(self.results, key=lambda result: result[1], reverse=self.maximize)
+        n_good = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good, bad = [a for a, _ in ranked[:n_good]], [a for a, _ in ranked[n_good:]]
+        return {name: self._suggest(expression, [a[name] for a in good], [a[name] for a in bad])
+                for name, expression in self.parameter_space.items()}
+
+    def tell(self, arguments, metric):
+        self.results.append((arguments, metric))
+
+    def _suggest(self, expression, good, bad):
+        kind, args = expression
+        if kind == 'choice':
+            # Smoothed counts of each option among the good and the bad trials
+            options = args[0]
+            l = np.array([good.count(o) + 1.0 for o in options]) / (len(good) + len(options))
+            g = np.array([bad.count(o) + 1.0 for o in options]) / (len(bad) + len(options))
+            candidates = self.rng.choice(len(options), size=self.n_candidates, p=l)
+            return options[candidates[np.argmax(l[candidates] / g[candidates])]]
+        # Continuous parameters are modelled on their (log) scale, between their bounds
+        log = kind == 'loguniform'
+        low, high = (0, args[0] - 1) if kind == 'randint' else (args[0], args[1])
+        to_space = (lambda v: np.log(np.asarray(v, dtype=float))) if log else (lambda v: np.asarray(v, dtype=float))
+        good_x, bad_x = to_space(good), to_space(bad)
+        bandwidth = max((high - low) / max(len(good) + len(bad), 1) ** 0.2, 1e-12) * 0.5
+        candidates = np.clip(self.rng.choice(good_x, self.n_candidates) + self.rng.normal(0, bandwidth, self.n_candidates),
+                             low, high)
+        score = parzen(candidates, good_x, bandwidth) / parzen(candidates, bad_x, bandwidth)
+        best = candidates[np.argmax(score)]
+        value = float(np.exp(best)) if log else float(best)
+        if kind == 'quniform':
+            return quantize(value, args[2])
+        return int(round(value)) if kind == 'randint' else value
+
+
+# Mixture of Gaussians around the observed values (flat when there are none)
+def parzen(x, centres, bandwidth):
+    if len(centres) == 0:
+        return np.ones_like(x)
+    z = (x[:, None] - centres[None, :]) / bandwidth
+    return np.exp(-0.5 * z ** 2).mean(axis=1) + 1e-12
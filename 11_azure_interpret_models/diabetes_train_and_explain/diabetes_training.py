@@ -1,8 +1,8 @@
 # Import libraries
-import pandas as pd
 import numpy as np
 import joblib
 import os
+import diabetes_store
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import roc_auc_score
@@ -18,16 +18,13 @@ from interpret.ext.blackbox import TabularExplainer
 # Get the experiment run context
 run = Run.get_context()
 
-# load the diabetes dataset
+# load the diabetes dataset as float32 features and 0/1 labels
 print("Loading Data...")
-data = pd.read_csv('diabetes.csv')
+X, y = diabetes_store.load_xy('diabetes.csv', label_dtype=np.int8)
 
-features = ['Pregnancies','PlasmaGlucose','DiastolicBloodPressure','TricepsThickness','SerumInsulin','BMI','DiabetesPedigree','Age']
+features = diabetes_store.features
 labels = ['not-diabetic', 'diabetic']
 
-# Separate features and labels
-X, y = data[features].values, data['Diabetic'].values
-
 # Split data into training set and test set
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.30, random_state=0)
 